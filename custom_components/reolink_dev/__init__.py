@@ -1,9 +1,13 @@
 """Reolink integration for HomeAssistant."""
 import asyncio
 from datetime import timedelta
+from functools import partial
 import logging
+import os
+import time
 
 import async_timeout
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
@@ -12,17 +16,26 @@ from homeassistant.const import (
     CONF_PORT,
     CONF_TIMEOUT,
     CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STARTED,
     EVENT_HOMEASSISTANT_STOP,
 )
-from homeassistant.core import HomeAssistant, Event
-from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers import device_registry
-from homeassistant.helpers.storage import STORAGE_DIR
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-
-from .base import ReolinkBase, ReolinkPush
+from homeassistant.core import HomeAssistant, Event, ServiceCall, callback
+from homeassistant.exceptions import ConfigEntryNotReady, HomeAssistantError
+from homeassistant.helpers import config_validation as cv, device_registry
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+
+from .base import ReolinkBase, ReolinkPush, STORAGE_VERSION
+from .breaker import CircuitOpenError
+from .capture import async_start_capture, async_stop_capture
+from .renewal import async_get_renewer
+from .scheduler import async_get_scheduler
+from .typings import CameraEvent
 from .const import (
+    ATTR_FILENAME,
     BASE,
+    CACHE_SAVE_DELAY,
+    CAPTURE_FILENAME,
     CONF_CHANNEL,
     CONF_USE_HTTPS,
     CONF_SMTP_PORT,
@@ -34,16 +47,27 @@ from .const import (
     CONF_STREAM_FORMAT,
     CONF_MOTION_STATES_UPDATE_FALLBACK_DELAY,
     CONF_ONVIF_SUBSCRIPTION_DISABLED,
+    CONF_ONVIF_PULL_POINT,
+    CONF_FAST_STARTUP,
+    CONF_EVENT_WINDOW,
+    DEFAULT_EVENT_WINDOW,
+    DEFAULT_ONVIF_PULL_POINT,
     DEFAULT_SMTP_PORT,
     COORDINATOR,
     MOTION_UPDATE_COORDINATOR,
     DOMAIN,
+    DOMAIN_DATA,
     EVENT_DATA_RECEIVED,
     PUSH_MANAGER,
     SERVICE_PTZ_CONTROL,
+    SERVICE_QUERY_EVENTS,
     SERVICE_QUERY_VOD,
     SERVICE_SET_DAYNIGHT,
     SERVICE_SET_SENSITIVITY,
+    SERVICE_START_CAPTURE,
+    SERVICE_STOP_CAPTURE,
+    SETUP_TIMES,
+    STARTUP_BUDGET,
 )
 
 SCAN_INTERVAL = timedelta(minutes=1)
@@ -65,6 +89,58 @@ async def async_setup(
     if default_thumbnail_path not in hass.config.allowlist_external_dirs:
         hass.config.allowlist_external_dirs.add(default_thumbnail_path)
 
+    async def async_report_setup_times(event: Event):  # pylint: disable=unused-argument
+        """Report how long the setup of all cameras took."""
+        setup_times: dict = hass.data.get(DOMAIN_DATA, {}).get(SETUP_TIMES)
+        if not setup_times:
+            return
+        started = min(times[0] for times in setup_times.values())
+        finished = max(times[1] for times in setup_times.values())
+        _LOGGER.info(
+            "Setup of %d Reolink camera(s) took %.2f seconds",
+            len(setup_times),
+            finished - started,
+        )
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STARTED, async_report_setup_times)
+
+    async def async_start_capture_service(call: ServiceCall):
+        """Capture the notifications of all cameras for replay."""
+        filename = call.data.get(ATTR_FILENAME)
+        if filename is None:
+            # The storage directory of the integration, allowed at setup
+            filename = hass.config.path(STORAGE_DIR, DOMAIN, CAPTURE_FILENAME)
+            await hass.async_add_executor_job(
+                partial(os.makedirs, os.path.dirname(filename), exist_ok=True)
+            )
+        elif not await hass.async_add_executor_job(hass.config.is_allowed_path, filename):
+            raise HomeAssistantError(f"Cannot write to {filename}, it is not an allowed path")
+        async_start_capture(hass, filename)
+
+    async def async_stop_capture_service(call: ServiceCall):  # pylint: disable=unused-argument
+        """Stop capturing the notifications."""
+        async_stop_capture(hass)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_CAPTURE,
+        async_start_capture_service,
+        schema=vol.Schema({vol.Optional(ATTR_FILENAME): cv.string}),
+    )
+    hass.services.async_register(DOMAIN, SERVICE_STOP_CAPTURE, async_stop_capture_service)
+
+    # Imported here, the websocket API can only be imported once Home Assistant is loaded
+    from .websocket import async_register_commands
+
+    async_register_commands(hass)
+
+    @callback
+    def async_stop_capture_on_stop(event: Event):  # pylint: disable=unused-argument
+        """Close the capture file when Home Assistant stops."""
+        async_stop_capture(hass)
+
+    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_stop_capture_on_stop)
+
     return True
 
 
@@ -72,18 +148,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Reolink from a config entry."""
 
     hass.data.setdefault(DOMAIN, {})
+    setup_started = time.monotonic()
 
     base = ReolinkBase(hass, entry.data, entry.options)
     base.sync_functions.append(entry.add_update_listener(update_listener))
 
-    try:
-        if not await base.connect_api():
-            raise ConfigEntryNotReady(f"Error while trying to setup {base.name}, API failed to provide required data")
-    except:
-        raise ConfigEntryNotReady(f"Error while trying to setup {base.name}, API had hard error")
+    # With fast startup the device description of the last run is used, and revalidated in the background
+    store = Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}")
+    restored = False
+    if base.fast_startup:
+        cache = await store.async_load()
+        restored = cache is not None and await base.restore_cache(cache)
+
+    if not restored:
+        try:
+            # With fast startup a slow camera may not hold up Home Assistant, it is retried later
+            async with async_timeout.timeout(STARTUP_BUDGET if base.fast_startup else None):
+                if not await base.connect_api():
+                    await base.disconnect_api()
+                    raise ConfigEntryNotReady(f"Error while trying to setup {base.name}, API failed to provide required data")
+        except ConfigEntryNotReady:
+            raise
+        except:
+            await base.disconnect_api()
+            raise ConfigEntryNotReady(f"Error while trying to setup {base.name}, API had hard error")
+
+        store.async_delay_save(lambda: base.cache_data, CACHE_SAVE_DELAY)
 
     hass.data[DOMAIN][entry.entry_id] = {BASE: base}
 
+    # Remaining initial data, awaited in order or fetched in the background with fast startup
+    initial_fetches = []
+
     try:
         """Get a push manager, there should be one push manager per mac address"""
         push = hass.data[DOMAIN][base.push_manager]
@@ -96,29 +192,60 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
             entry.data[CONF_PASSWORD],
         )
         if not base.onvif_subscription_disabled:
-            await push.subscribe(base.event_id)
+            initial_fetches.append(push.subscribe(base.event_id, base.onvif_pull_point))
+            async_get_renewer(hass).async_add_job(
+                base.push_manager, lambda: push.lease, push.renew
+            )
 
         await push.set_smtp_port(entry.options.get(CONF_SMTP_PORT, DEFAULT_SMTP_PORT))
+        push.coalescer.window = entry.options.get(CONF_EVENT_WINDOW, DEFAULT_EVENT_WINDOW)
         hass.data[DOMAIN][base.push_manager] = push
+    push.add_member(base)
 
     async def async_update_data():
         """Perform the actual updates."""
 
-        async with async_timeout.timeout(base.timeout):
-            if not base.onvif_subscription_disabled:
-                await push.renew()
-            await base.update_states()
+        try:
+            async with async_timeout.timeout(base.timeout):
+                await base.update_states()
+        except CircuitOpenError as ex:
+            raise UpdateFailed(str(ex)) from ex
+
+    # Polling is driven by the integration wide scheduler, not by the coordinators
+    scheduler = async_get_scheduler(hass)
 
     coordinator = DataUpdateCoordinator(
         hass,
         _LOGGER,
         name="reolink.{}".format(base.name),
         update_method=async_update_data,
-        update_interval=SCAN_INTERVAL,
     )
 
-    # Fetch initial data so we have data when entities subscribe
-    await coordinator.async_refresh()
+    @callback
+    def async_states_fetched():
+        """States of the other channels of an NVR are fetched along, hand them over."""
+        coordinator.async_set_updated_data(None)
+        scheduler.async_reschedule(f"{entry.entry_id}-{COORDINATOR}")
+
+    base.host.async_add_states_listener(base.api, async_states_fetched)
+
+    # Fetch initial data so we have data when entities subscribe,
+    # with fast startup the states of connect_api are used instead
+    if restored:
+        async def async_revalidate_cache():
+            """Connect to the camera and refresh the restored device description."""
+            try:
+                if not await base.connect_api():
+                    raise ConnectionError("API failed to provide required data")
+            except Exception as ex:  # pylint: disable=broad-except
+                _LOGGER.warning("Could not revalidate the cached data of %s: %s", base.name, ex)
+                return
+            store.async_delay_save(lambda: base.cache_data, CACHE_SAVE_DELAY)
+            coordinator.async_set_updated_data(None)
+
+        initial_fetches.append(async_revalidate_cache())
+    elif not base.fast_startup:
+        initial_fetches.append(coordinator.async_refresh())
 
     async def async_update_motion_states():
         """Perform motion state updates in case webhooks are not functional"""
@@ -127,19 +254,56 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         async with async_timeout.timeout(base.timeout):
             # Force a refresh of motion sensors (in case Webhook is broken)
             if base.sensor_motion_detection is not None:
-                # hass.bus.async_fire(base.event_id, {"motion": False})
-                await base.sensor_motion_detection.handle_event(Event(base.event_id, {"motion": True, "available": True}))
+                await base.sensor_motion_detection.handle_event(CameraEvent(motion=True, available=True))
 
     coordinator_motion_update = DataUpdateCoordinator(
         hass,
         _LOGGER,
         name="reolink.{}.motion_states".format(base.name),
         update_method=async_update_motion_states,
-        update_interval=timedelta(seconds=base.motion_states_update_fallback_delay),
     )
 
     # Fetch initial data so we have data when entities subscribe
-    await coordinator_motion_update.async_refresh()
+    initial_fetches.append(coordinator_motion_update.async_refresh())
+
+    if base.fast_startup:
+        async def async_initial_fetch():
+            """Fetch the remaining initial data concurrently while entities are created."""
+            results = await asyncio.gather(*initial_fetches, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    _LOGGER.warning("Initial data of %s could not be fetched: %s", base.name, result)
+            _LOGGER.debug(
+                "Live data of %s available after %.2f seconds",
+                base.name,
+                time.monotonic() - setup_started,
+            )
+
+        hass.async_create_task(async_initial_fetch())
+    else:
+        for initial_fetch in initial_fetches:
+            await initial_fetch
+
+    scheduler.async_add_job(
+        f"{entry.entry_id}-{COORDINATOR}", base.unique_id, coordinator, SCAN_INTERVAL
+    )
+    motion_states_interval = None
+    if base.motion_states_update_fallback_delay is not None and base.motion_states_update_fallback_delay > 0:
+        motion_states_interval = timedelta(seconds=base.motion_states_update_fallback_delay)
+    scheduler.async_add_job(
+        f"{entry.entry_id}-{MOTION_UPDATE_COORDINATOR}",
+        base.unique_id,
+        coordinator_motion_update,
+        motion_states_interval,
+    )
+
+    @callback
+    def async_availability_changed():
+        """The circuit breaker of the host opened or closed, update the entities."""
+        coordinator.async_update_listeners()
+        coordinator_motion_update.async_update_listeners()
+
+    entry.async_on_unload(base.host.breaker.async_add_listener(async_availability_changed))
 
     for component in PLATFORMS:
         hass.async_create_task(
@@ -151,9 +315,21 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, base.stop())
 
+    setup_finished = time.monotonic()
+    hass.data.setdefault(DOMAIN_DATA, {}).setdefault(SETUP_TIMES, {})[entry.entry_id] = (
+        setup_started,
+        setup_finished,
+    )
+    _LOGGER.debug("Setup of %s took %.2f seconds", base.name, setup_finished - setup_started)
+
     return True
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the cached device description of a removed config entry."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     """Update the configuration at the base entity and API."""
     base: ReolinkBase = hass.data[DOMAIN][entry.entry_id][BASE]
@@ -167,23 +343,32 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     await base.set_stream(entry.options[CONF_STREAM])
     await base.set_stream_format(entry.options[CONF_STREAM_FORMAT])
     await base.set_smtp_port(entry.options[CONF_SMTP_PORT])
+    hass.data[DOMAIN][base.push_manager].coalescer.window = entry.options.get(
+        CONF_EVENT_WINDOW, DEFAULT_EVENT_WINDOW
+    )
 
     motion_state_coordinator: DataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][MOTION_UPDATE_COORDINATOR]
+    scheduler = async_get_scheduler(hass)
 
     base.motion_states_update_fallback_delay = entry.options[CONF_MOTION_STATES_UPDATE_FALLBACK_DELAY]
     base.onvif_subscription_disabled = entry.options[CONF_ONVIF_SUBSCRIPTION_DISABLED]
 
-    if motion_state_coordinator.update_interval != base.motion_states_update_fallback_delay:
-        if base.motion_states_update_fallback_delay is None or base.motion_states_update_fallback_delay <= 0:
-            # _LOGGER.debug("Motion state fallback delay disabled".format(motion_state_coordinator.update_interval))
-            motion_state_coordinator.update_interval = None
-        else:
-            motion_state_coordinator.update_interval = timedelta(seconds=base.motion_states_update_fallback_delay)
-            # _LOGGER.debug("Motion state fallback delay changed to {}".format(motion_state_coordinator.update_interval))
-            await motion_state_coordinator.async_refresh()
+    onvif_pull_point = entry.options.get(CONF_ONVIF_PULL_POINT, DEFAULT_ONVIF_PULL_POINT)
+    if onvif_pull_point != base.onvif_pull_point:
+        base.onvif_pull_point = onvif_pull_point
+        push: ReolinkPush = hass.data[DOMAIN][base.push_manager]
+        if not base.onvif_subscription_disabled:
+            await push.unsubscribe()
+            await push.subscribe(base.event_id, onvif_pull_point)
+
+    if base.motion_states_update_fallback_delay is None or base.motion_states_update_fallback_delay <= 0:
+        scheduler.async_set_interval(f"{entry.entry_id}-{MOTION_UPDATE_COORDINATOR}", None)
     else:
-        # _LOGGER.debug("Motion state fallback delay is unchanged ({})".format(motion_state_coordinator.update_interval))
-        pass
+        scheduler.async_set_interval(
+            f"{entry.entry_id}-{MOTION_UPDATE_COORDINATOR}",
+            timedelta(seconds=base.motion_states_update_fallback_delay),
+        )
+        await motion_state_coordinator.async_refresh()
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
@@ -193,7 +378,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     await base.set_smtp_port(0) # Stop SMTP server
 
-    if not await push.count_members() > 1:
+    scheduler = async_get_scheduler(hass)
+    scheduler.async_remove_job(f"{entry.entry_id}-{COORDINATOR}")
+    scheduler.async_remove_job(f"{entry.entry_id}-{MOTION_UPDATE_COORDINATOR}")
+
+    push.remove_member(base)
+    if await push.count_members() == 0:
+        async_get_renewer(hass).async_remove_job(base.push_manager)
         await push.unsubscribe()
         hass.data[DOMAIN].pop(base.push_manager)
 
@@ -215,5 +406,6 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         hass.services.async_remove(DOMAIN, SERVICE_SET_DAYNIGHT)
         hass.services.async_remove(DOMAIN, SERVICE_SET_SENSITIVITY)
         hass.services.async_remove(DOMAIN, SERVICE_QUERY_VOD)
+        hass.services.async_remove(DOMAIN, SERVICE_QUERY_EVENTS)
 
     return unload_ok
@@ -1,14 +1,14 @@
 """This component updates the camera API and subscription."""
+import asyncio
+from collections import deque
 import logging
 import os
-import re
-import base64
+import time
 
-from aiosmtpd.controller import Controller
 
 import datetime as dt
-from typing import Optional
-import ssl
+from functools import partial
+from typing import Deque, Dict, List, Optional, Set, Tuple
 
 from urllib.parse import quote_plus
 from dateutil.relativedelta import relativedelta
@@ -20,16 +20,22 @@ from homeassistant.const import (
     CONF_TIMEOUT,
     CONF_USERNAME,
 )
-from homeassistant.core import Context, HomeAssistant
+from homeassistant.core import Context, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.network import get_url, NoURLAvailableError
 from homeassistant.helpers.storage import STORAGE_DIR
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
 import homeassistant.util.dt as dt_util
 
-from reolink.camera_api import Api
-from reolink.subscription_manager import Manager
+from reolink.subscription_manager import TERMINATION_TIME, Manager
 from reolink.typings import SearchTime
-from .typings import VoDEvent, VoDEventThumbnail
+from .host import ReolinkHost
+from .capture import KIND_WEBHOOK, get_capture
+from .coalescer import EventCoalescer
+from .history import SOURCE_PULL_POINT, SOURCE_SMTP, SOURCE_WEBHOOK, EventHistory
+from .onvif import OnvifEvent, OnvifNotificationParser
+from .pullpoint import PullPointManager
+from .smtp import SMTP_EVENTS, AlarmMail, SmtpTarget, async_get_smtp_server
+from .typings import CameraEvent, VoDEvent, VoDEventThumbnail
 
 from .const import (
     BASE,
@@ -45,6 +51,8 @@ from .const import (
     CONF_STREAM_FORMAT,
     CONF_MOTION_STATES_UPDATE_FALLBACK_DELAY,
     CONF_ONVIF_SUBSCRIPTION_DISABLED,
+    CONF_ONVIF_PULL_POINT,
+    CONF_FAST_STARTUP,
     DEFAULT_USE_HTTPS,
     DEFAULT_CHANNEL,
     DEFAULT_MOTION_OFF_DELAY,
@@ -54,12 +62,20 @@ from .const import (
     DEFAULT_TIMEOUT,
     DEFAULT_MOTION_STATES_UPDATE_FALLBACK_DELAY,
     DEFAULT_ONVIF_SUBSCRIPTION_DISABLED,
+    DEFAULT_ONVIF_PULL_POINT,
+    DEFAULT_FAST_STARTUP,
+    DEFAULT_EVENT_WINDOW,
     DOMAIN,
+    DOMAIN_DATA,
+    EVENT_HISTORY_SIZE,
+    MOTION_STATES_MAX_AGE,
     PUSH_MANAGER,
-    SESSION_RENEW_THRESHOLD,
+    SNAPSHOT_CACHE_SIZE,
+    SNAPSHOT_MATCH_SLACK,
     THUMBNAIL_EXTENSION,
     THUMBNAIL_URL,
     VOD_URL,
+    WEBHOOKS,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -113,21 +129,21 @@ class ReolinkBase:
         else:
             self._protocol = options[CONF_PROTOCOL]
 
-        global last_known_hass
-        last_known_hass = hass
-
-        self._api = Api(
+        self._host = ReolinkHost.get(
+            hass,
             config[CONF_HOST],
             config[CONF_PORT],
             self._username,
             self._password,
-            use_https=self._use_https,
-            channel=self._channel - 1,
+            self._use_https,
+            self._timeout,
+        )
+        self._api = self._host.channel_api(
+            self._channel - 1,
             stream=self._stream,
             stream_format=self._stream_format,
             protocol=self._protocol,
             timeout=self._timeout,
-            aiohttp_get_session_callback=callback_get_iohttp_session
         )
 
         self._hass = hass
@@ -162,6 +178,12 @@ class ReolinkBase:
         if CONF_ONVIF_SUBSCRIPTION_DISABLED in options:
             self.onvif_subscription_disabled = options[CONF_ONVIF_SUBSCRIPTION_DISABLED]
 
+        self.onvif_pull_point = options.get(CONF_ONVIF_PULL_POINT, DEFAULT_ONVIF_PULL_POINT)
+
+        self.fast_startup = DEFAULT_FAST_STARTUP
+        if CONF_FAST_STARTUP in options:
+            self.fast_startup = options[CONF_FAST_STARTUP]
+
         from .binary_sensor import MotionSensor, ObjectDetectedSensor
 
         self.sensor_motion_detection: Optional[MotionSensor] = None
@@ -169,6 +191,14 @@ class ReolinkBase:
         self.sensor_vehicle_detection: Optional[ObjectDetectedSensor] = None
         self.sensor_pet_detection: Optional[ObjectDetectedSensor] = None
 
+        self.capabilities: List[str] = []
+
+        self._motion_states_request: Optional[asyncio.Task] = None
+        self._motion_states_updated: Optional[float] = None
+
+        self._snapshots: Deque[Tuple[dt.datetime, bytes]] = deque(maxlen=SNAPSHOT_CACHE_SIZE)
+        self.history = EventHistory(EVENT_HISTORY_SIZE)
+
     @property
     def name(self):
         """Create the device name."""
@@ -207,6 +237,30 @@ class ReolinkBase:
         """Return the API object."""
         return self._api
 
+    @property
+    def host(self):
+        """Return the session shared with the other channels of the host."""
+        return self._host
+
+    @property
+    def event_signal(self):
+        """Return the signal of the motion and availability events of the channel."""
+        return f"{DOMAIN}_{self.unique_id}_event"
+
+    def handles_event(self, event: CameraEvent) -> bool:
+        """Return True if an event of the push manager concerns this channel."""
+        return event.channels is None or self._channel - 1 in event.channels
+
+    @callback
+    def async_send_event(self, event: CameraEvent):
+        """Signal an event to the entities of the channel."""
+        async_dispatcher_send(self._hass, self.event_signal, event)
+
+    @property
+    def available(self):
+        """Return False while the circuit breaker of the host keeps requests back."""
+        return self._host.breaker.is_closed
+
     @property
     def thumbnail_path(self):
         """ Thumbnail storage location """
@@ -216,6 +270,44 @@ class ReolinkBase:
             )
         return self._thumbnail_path
 
+    @property
+    def latest_snapshot(self) -> Optional[bytes]:
+        """Return the image of the latest alarm e-mail."""
+        return self._snapshots[-1][1] if self._snapshots else None
+
+    @callback
+    def async_add_snapshot(self, image: bytes, received: Optional[dt.datetime] = None):
+        """Keep the image attached to an alarm e-mail."""
+        self._snapshots.append((received or dt_util.now(), image))
+
+    async def async_save_thumbnail(
+        self, start: dt.datetime, end: dt.datetime, path: str
+    ) -> bool:
+        """Save the alarm e-mail image received during an event as its thumbnail."""
+        slack = dt.timedelta(seconds=SNAPSHOT_MATCH_SLACK)
+        image = next(
+            (
+                image
+                for received, image in reversed(self._snapshots)
+                if start - slack <= received <= end + slack
+            ),
+            None,
+        )
+        if image is None:
+            return False
+
+        def write():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(image)
+
+        try:
+            await self._hass.async_add_executor_job(write)
+        except OSError as ex:
+            _LOGGER.warning("Could not save the thumbnail %s: %s", path, ex)
+            return False
+        return True
+
     def enable_https(self, enable: bool):
         self._use_https = enable
         self._api.enable_https(enable)
@@ -228,11 +320,32 @@ class ReolinkBase:
         """Connect to the Reolink API and fetch initial dataset."""
         if not await self._api.get_settings():
             return False
-        if not await self._api.get_states():
+
+        # Both requests go out as one batch, the states depend on the API versions of the settings
+        states, _ = await asyncio.gather(
+            self._api.get_states(), self._api.get_ai_state()
+        )
+        if not states:
             return False
-            
-        await self._api.get_ai_state()
+
         await self._api.is_admin()
+        self.capabilities = await self._api.get_switch_capabilities()
+        return True
+
+    @property
+    def cache_data(self) -> dict:
+        """Return the device description and capabilities to persist."""
+        return {**self._api.cache_data, "capabilities": self.capabilities}
+
+    async def restore_cache(self, data: dict) -> bool:
+        """Restore the device description persisted by an earlier run, without connecting.
+
+        The settings are not persisted, the states of the switches are unknown
+        until the cache is revalidated.
+        """
+        if "capabilities" not in data or not self._api.restore_cache(data):
+            return False
+        self.capabilities = data["capabilities"]
         return True
 
     async def set_channel(self, channel):
@@ -259,21 +372,51 @@ class ReolinkBase:
         """Set the API timeout."""
         self._timeout = timeout
         await self._api.set_timeout(timeout)
+        await self._host.set_timeout(timeout)
 
     async def set_smtp_port(self, port):
         push = self._hass.data[DOMAIN][self.push_manager]
         await push.set_smtp_port(port)
 
     async def update_states(self):
-        """Call the API of the camera device to update the states."""
-        await self._api.get_states()
+        """Call the API of the camera device to update the states (of all channels of the host)."""
+        await self._host.update_states(self._api)
+
+    async def get_all_motion_states(self):
+        """Query the motion and AI states, concurrent callers share one request.
+
+        A result younger than MOTION_STATES_MAX_AGE is reused, a burst of events
+        then only costs one request.
+        """
+        if self._motion_states_request is None:
+            if (
+                self._motion_states_updated is not None
+                and self._hass.loop.time() - self._motion_states_updated < MOTION_STATES_MAX_AGE
+            ):
+                return self._api.motion_state
+
+            self._motion_states_request = self._hass.async_create_task(
+                self._async_get_all_motion_states()
+            )
+        return await asyncio.shield(self._motion_states_request)
+
+    async def _async_get_all_motion_states(self):
+        """Query the motion and AI states of the channel."""
+        try:
+            motion_state = await self._api.get_all_motion_states()
+        finally:
+            self._motion_states_request = None
+        # A failed query also returns False, it is not reused
+        if self._api.motion_states_fetched:
+            self._motion_states_updated = self._hass.loop.time()
+        return motion_state
 
     async def update_settings(self):
         """Call the API of the camera device to update the settings."""
         await self._api.get_settings()
 
     async def disconnect_api(self):
-        """Disconnect from the API, so the connection will be released."""
+        """Disconnect from the API, the host session logs out with its last channel."""
         await self._api.logout()
 
     async def stop(self):
@@ -340,7 +483,7 @@ class ReolinkBase:
 # HomeAssistant starting 2022.3 when trying to retrieve internal URL
 warnedAboutNoURLAvailableError = False
 
-class ReolinkPush:
+class ReolinkPush(SmtpTarget):
     """The implementation of the Reolink IP base class."""
 
     def __init__(
@@ -354,96 +497,209 @@ class ReolinkPush:
         self._hass = hass
 
         self._sman = None
+        self._pull_point: Optional[PullPointManager] = None
         self._webhook_url = None
         self._webhook_id = None
         self._event_id = None
+        self._members: List[ReolinkBase] = []
+        self.coalescer = EventCoalescer(hass, DEFAULT_EVENT_WINDOW, self._fire_event, host)
 
         self.smtp_motion_warn = True
         self.smtp_port = 0
-        self.smtp = None
+        self._smtp_addresses: Set[str] = set()
 
-    # Create/start/stop SMTP server on parameter change
+    # Route the e-mails of the SMTP server port to the push manager on parameter change
     async def set_smtp_port(self, port):
-        if self.smtp_port is not port:
-            if self.smtp:
-                _LOGGER.info("Stopping SMTP server on port %i", self.smtp_port)
-                self.smtp.stop()
-                self.smtp = None
-            if self.smtp is None and port is not None and port > 0:
-                _LOGGER.info("Starting SMTP server on port %i", port)
-                self.smtp = Controller(self, hostname='', port=port)
-                self.smtp.start()
+        if self.smtp_port == port:
+            return
+        server = async_get_smtp_server(self._hass)
+        if self.smtp_port:
+            await server.async_remove_target(self.smtp_port, self)
+        if port is not None and port > 0:
+            try:
+                addresses = await self._hass.loop.getaddrinfo(self._host, None)
+                self._smtp_addresses = {address[4][0] for address in addresses}
+            except OSError:
+                self._smtp_addresses = {self._host}
+            await server.async_add_target(port, self)
         self.smtp_port = port
 
-    # SMTP EHLO callback
-    async def handle_EHLO(server, session, envelope, hostname, responses):
-        _LOGGER.debug("SMTP EHLO")
-        return "" # Force error in EHLO querry so client falls back to HELO
-
-    # SMTP data callback
-    async def handle_DATA(self, server, session, envelope):
-        _LOGGER.debug("SMTP data")
-        handled = False
-        matches = re.findall(r'base64[\r\n]+(.+?)[\r\n]+', envelope.content.decode('ascii'))
-        if matches:
-            for x in matches:
-                _LOGGER.debug("SMTP data base64: %s", x)
-                try:
-                    text = base64.b64decode(x).decode('ascii')
-                    _LOGGER.debug("SMTP data ascii: %s", text)
-                except:
-                    continue
-                if re.match(".*tested the e-mail alert.*", text) is not None:
-                    # Full text: "If you receive this e-mail you have successfully set up and tested the e-mail alert from your IPC"
-                    _LOGGER.warning("SMTP test email received")
-                    handled = True
-                name = re.findall(r'Alarm Camera Name:\s*(.+?)\s*[\r\n]+', text)
-                event = re.findall(r'Alarm Event:\s*(.+?)\s*[\r\n]+', text)
-                if name and event:
-                    _LOGGER.debug("SMTP name: %s", name[0])
-                    _LOGGER.debug("SMTP event: %s", event[0])
-                    if (event[0] == "Motion Detection"):
-                        _LOGGER.info("SMTP motion detected")
-                        handled = True
-                        if self.smtp_motion_warn:
-                            self.smtp_motion_warn = False
-                            _LOGGER.warning("SMTP non-AI motion event is inferrior to webhooks,"
-                                            " and probably should be disabled."
-                                            " The time limit between events may mask AI detection events."
-                                            " This warning will only print once.")
-                        self._hass.bus.async_fire(self._event_id, {"motion": True})
-                    elif (event[0] == "Person Detected"):
-                        _LOGGER.info("SMTP person detected")
-                        handled = True
-                        self._hass.bus.async_fire(self._event_id, {"motion": True, "smtp": "person"})
-                    elif (event[0] == "Vehicle Detected"):
-                        _LOGGER.info("SMTP vehicle detected")
-                        handled = True
-                        self._hass.bus.async_fire(self._event_id, {"motion": True, "smtp": "vehicle"})
-                    elif (event[0] == "Pet Detected"):
-                        _LOGGER.info("SMTP pet detected")
-                        handled = True
-                        self._hass.bus.async_fire(self._event_id, {"motion": True, "smtp": "pet"})
-                    elif (event[0] == "Dog or cat Detected"):
-                        _LOGGER.info("SMTP pet detected")
-                        handled = True
-                        self._hass.bus.async_fire(self._event_id, {"motion": True, "smtp": "pet"})
-
-        if not handled:
-            _LOGGER.warning("SMTP received unhandled message: %s", envelope.content.decode('ascii'))
-            return "541 ERROR"
-        else:
-            return "250 OK"
+    @property
+    def smtp_addresses(self) -> Set[str]:
+        """Return the IP addresses of the host."""
+        return self._smtp_addresses
+
+    @property
+    def smtp_senders(self) -> Set[str]:
+        """Return the sender addresses configured on the channels."""
+        return {base.api.email_sender.lower() for base in self._members if base.api.email_sender}
+
+    def has_camera(self, name: str) -> bool:
+        """Return True if a channel has the camera name of an e-mail."""
+        return any(base.name == name for base in self._members)
+
+    @callback
+    def async_handle_mail(self, mail: AlarmMail):
+        """Fire the event of an alarm e-mail."""
+        if mail.test:
+            # Full text: "If you receive this e-mail you have successfully set up and tested the e-mail alert from your IPC"
+            _LOGGER.warning("SMTP test email received")
+
+        if mail.event in SMTP_EVENTS:
+            object_type = SMTP_EVENTS[mail.event]
+            _LOGGER.info("SMTP %s detected", object_type or "motion")
+            if object_type is None and self.smtp_motion_warn:
+                self.smtp_motion_warn = False
+                _LOGGER.warning("SMTP non-AI motion event is inferrior to webhooks,"
+                                " and probably should be disabled."
+                                " The time limit between events may mask AI detection events."
+                                " This warning will only print once.")
+            data = {"motion": True, "source": SOURCE_SMTP}
+            if object_type is not None:
+                data["smtp"] = object_type
+            if mail.snapshot:
+                self.async_add_snapshot(mail.camera_name, mail.snapshot, dt_util.now())
+            self.async_add_event(data)
 
     @property
     def sman(self):
         """Return the session manager object."""
         return self._sman
 
-    async def subscribe(self, event_id):
-        """Subscribe to motion events and set the webhook as callback."""
+    @property
+    def event_id(self):
+        """Return the event ID fired for the webhook."""
+        return self._event_id
+
+    @property
+    def members(self) -> List[ReolinkBase]:
+        """Return the camera's using this push manager."""
+        return self._members
+
+    def add_member(self, base: ReolinkBase):
+        """Register a camera using this push manager."""
+        if base not in self._members:
+            self._members.append(base)
+
+    def remove_member(self, base: ReolinkBase):
+        """Unregister a camera using this push manager."""
+        if base in self._members:
+            self._members.remove(base)
+
+    @callback
+    def async_add_onvif_events(self, events: List[OnvifEvent], source: str = SOURCE_WEBHOOK):
+        """Fire the motion event of the ONVIF notifications of a webhook call or pull."""
+        motion = [event.state for event in events if event.object_type == "motion"]
+        objects = {
+            event.object_type: event.state
+            for event in events
+            if event.object_type is not None and event.object_type != "motion"
+        }
+        if not motion and not objects:
+            return
+
+        # Object topics alone tell nothing about the motion state
+        is_motion = any(motion) if motion else None
+        _LOGGER_DATA.debug("Host %s ONVIF motion: %s, objects: %s", self._host, is_motion, objects)
+
+        channel = next((event.channel for event in events if event.channel is not None), None)
+        self.async_add_event(
+            {"motion": is_motion, "objects": objects, "channel": channel, "source": source}
+        )
+
+    @callback
+    def async_add_snapshot(self, camera_name: str, image: bytes, received: dt.datetime):
+        """Keep the image of an alarm e-mail for the channel it was sent by."""
+        members = [base for base in self._members if base.name == camera_name]
+        if not members and len(self._members) == 1:
+            members = self._members
+        for base in members:
+            base.async_add_snapshot(image, received)
+
+    @property
+    def is_nvr(self) -> bool:
+        """Return True if the events are shared by the channels of an NVR."""
+        return any(base.api.is_nvr() for base in self._members)
+
+    @callback
+    def async_add_event(self, data: dict):
+        """Fire a motion event, merged with the events of the same burst."""
+        channel = data.get("channel")
+        self.coalescer.async_add_event(data, channel if self.is_nvr else None)
+
+    @callback
+    def _fire_event(self, data: dict):
+        """Signal a (merged) motion event, for an NVR only to the channels it concerns."""
+        if not self.is_nvr:
+            self._async_dispatch(data, self._members)
+            return
+        self._hass.async_create_task(self._async_route_event(data))
+
+    @callback
+    def _async_dispatch(self, data: dict, members: List[ReolinkBase]):
+        """Signal a motion event to the entities of the members, and fire it for the users."""
+        event = CameraEvent(
+            motion=data.get("motion"),
+            objects=data.get("objects"),
+            smtp_objects=data.get("smtp_objects", []),
+            channel=data.get("channel"),
+            channels=data.get("channels"),
+            timestamp=data.get("timestamp"),
+        )
+        for base in members:
+            base.history.add_event(data, base.channel)
+            base.async_send_event(event)
+        # The users' automations expect a motion state
+        if data.get("motion") is not None:
+            self._hass.bus.async_fire(self._event_id, data)
+
+    async def _async_route_event(self, data: dict):
+        """Find the channels of an NVR an event is about.
+
+        The channel decoded from the notification is used when it is one of the
+        members, otherwise the motion states of all members are queried at once
+        (the host merges the queries into one request) and the event goes to the
+        channels whose states are set or changed.
+        """
+        channel = data.get("channel")
+        if any(base.channel - 1 == channel for base in self._members):
+            channels = [channel]
+        else:
+            channels = await self._async_query_channels()
+            if not channels:
+                _LOGGER.debug("Host %s event concerns none of the channels", self._host)
+                return
+        _LOGGER.debug("Host %s event routed to channel(s) %s", self._host, channels)
+        self._async_dispatch(
+            {**data, "channels": channels},
+            [base for base in self._members if base.channel - 1 in channels],
+        )
+
+    async def _async_query_channels(self) -> List[int]:
+        """Query the motion states of all members, return the channels with motion or a change."""
+        members = list(self._members)
+        before = [(base.api.motion_state, base.api.ai_state) for base in members]
+        results = await asyncio.gather(
+            *[base.get_all_motion_states() for base in members], return_exceptions=True
+        )
+        channels = []
+        for base, previous, result in zip(members, before, results):
+            # A failed query is left to the sensors of the channel to report
+            if (
+                isinstance(result, Exception)
+                or base.api.motion_state
+                or (base.api.motion_state, base.api.ai_state) != previous
+            ):
+                channels.append(base.channel - 1)
+        return channels
+
+    async def subscribe(self, event_id, pull_point: bool = False):
+        """Subscribe to motion events and set the webhook as callback, or pull them."""
         global warnedAboutNoURLAvailableError
         self._event_id = event_id
+        if pull_point:
+            return await self.subscribe_pull_point()
+
         self._webhook_id = await self.register_webhook()
 
         try:
@@ -463,9 +719,10 @@ class ReolinkPush:
                     self._hass.components.webhook.async_generate_path(self._webhook_id),
                 )
             except NoURLAvailableError as ex:
-                # If we can't get a URL for external or internal, we will still mark the camara as available
-                await self.set_available(True)
-                return False
+                # The camera can't call HA without a URL, let HA pull the events instead
+                _LOGGER.info("Host %s has no URL to call, pulling its events instead", self._host)
+                await self.unregister_webhook()
+                return await self.subscribe_pull_point()
 
         self._sman = Manager(self._host, self._port, self._username, self._password)
         if await self._sman.subscribe(self._webhook_url):
@@ -481,8 +738,26 @@ class ReolinkPush:
                 self._host,
             )
             await self.set_available(False)
+            return False
+        return True
+
+    async def subscribe_pull_point(self):
+        """Pull the motion events through an ONVIF PullPoint subscription."""
+        if self._pull_point is None:
+            self._pull_point = PullPointManager(
+                self._hass, self._host, self._port, self._username, self._password
+            )
+        self._pull_point.start(
+            partial(self.async_add_onvif_events, source=SOURCE_PULL_POINT),
+            self.async_set_available,
+        )
         return True
 
+    @property
+    def pull_point(self) -> bool:
+        """Return True if the events are pulled instead of calling the webhook."""
+        return self._pull_point is not None
+
     async def register_webhook(self):
         """
         Register a webhook for motion events if it does not exist yet (in case of NVR).
@@ -497,71 +772,119 @@ class ReolinkPush:
         self._hass.components.webhook.async_register(
             DOMAIN, self._event_id, webhook_id, handle_webhook
         )
+        _webhooks(self._hass)[webhook_id] = self
 
         return webhook_id
 
-    async def renew(self):
+    @property
+    def lease(self) -> Optional[float]:
+        """Return the seconds left of the subscription lease, None if not subscribed."""
+        manager = self._pull_point or self._sman
+        if manager is None:
+            return None
+        # renewtimer drops the sign of the difference, so an expired lease would look like a day
+        # pylint: disable=protected-access
+        if manager._termination_time is None or manager._time_difference is None:
+            return None
+        return max((manager._termination_time - _remote_time(manager)).total_seconds(), 0)
+
+    @staticmethod
+    def _renewed(manager: Manager):
+        """Set the lease of a renewed subscription to the duration requested.
+
+        The library adds the duration to the old termination time instead, which
+        would double the lease of a subscription renewed before it expires.
+        """
+        # pylint: disable=protected-access
+        manager._termination_time = _remote_time(manager) + dt.timedelta(minutes=TERMINATION_TIME)
+
+    async def renew(self) -> bool:
         """Renew the subscription of the motion events (lease time is set to 15 minutes)."""
 
+        # The pull point subscribes again by itself while it is not subscribed, nothing to renew
+        if self._pull_point is not None:
+            if not self._pull_point.subscribed:
+                return False
+            if not await self._pull_point.renew():
+                _LOGGER.error("Host %s error renewing the Reolink pull point subscription", self._host)
+                return False
+            self._renewed(self._pull_point)
+            _LOGGER.debug("Host %s renewed the Reolink pull point subscription", self._host)
+            return True
+
         # _sman is available only if subscription was able to find an Internal/External URL, we can retry in case user has
         # fixed it after HASS config change
         if self._sman is None:
             return await self.subscribe(self._event_id)
 
-        if self._sman.renewtimer <= SESSION_RENEW_THRESHOLD:
-            if not await self._sman.renew():
-                _LOGGER.error(
-                    "Host %s error renewing the Reolink subscription",
-                    self._host,
-                )
-                await self.set_available(False)
-                await self._sman.subscribe(self._webhook_url)
-            else:
-                _LOGGER.info(
-                    "Host %s SUCCESSFULLY renewed Reolink subscription",
-                    self._host,
-                )
-                await self.set_available(True)
+        if not await self._sman.renew():
+            _LOGGER.error(
+                "Host %s error renewing the Reolink subscription",
+                self._host,
+            )
+            await self.set_available(False)
+            if not await self._sman.subscribe(self._webhook_url):
+                return False
         else:
-            await self.set_available(True)
+            self._renewed(self._sman)
+            _LOGGER.info(
+                "Host %s SUCCESSFULLY renewed Reolink subscription",
+                self._host,
+            )
+        await self.set_available(True)
+        return True
 
     async def set_available(self, available: bool):
         """Set the availability state to the base object."""
-        self._hass.bus.async_fire(self._event_id, {"available": available})
+        self.async_set_available(available)
+
+    @callback
+    def async_set_available(self, available: bool):
+        """Set the availability state to the base object."""
+        for base in self._members:
+            base.async_send_event(CameraEvent(available=available))
 
     async def unsubscribe(self):
         """Unsubscribe from the motion events."""
+        self.coalescer.async_stop()
         await self.set_available(False)
         await self.unregister_webhook()
+        if self._pull_point is not None:
+            await self._pull_point.stop()
+            self._pull_point = None
+            return True
+        if self._sman is None:
+            return True
         return await self._sman.unsubscribe()
 
     async def unregister_webhook(self):
         """Unregister the webhook for motion events."""
+        if self._webhook_id is None:
+            return
 
         _LOGGER.debug("Unregistering webhook %s", self._webhook_id)
         self._hass.components.webhook.async_unregister(self._webhook_id)
+        _webhooks(self._hass).pop(self._webhook_id, None)
+        self._webhook_id = None
 
     async def count_members(self):
         """Count the number of camera's using this push manager."""
-        members = 0
-        for entry_id in self._hass.data[DOMAIN]:
-            _LOGGER.debug("Got data entry: %s", entry_id)
-
-            if PUSH_MANAGER in entry_id:
-                continue  # Count config entries only
-
-            try:
-                base = self._hass.data[DOMAIN][entry_id][BASE]
-                if base.event_id == self._event_id:
-                    members += 1
-            except AttributeError:
-                pass
-            except KeyError:
-                pass
+        members = len(self._members)
         _LOGGER.debug("Found %d listeners for event %s", members, self._event_id)
         return members
 
 
+def _remote_time(manager: Manager) -> dt.datetime:
+    """Return the current time of the camera of a subscription, naive UTC like its lease."""
+    # pylint: disable=protected-access
+    return dt.datetime.utcnow() + dt.timedelta(seconds=manager._time_difference)
+
+
+def _webhooks(hass: HomeAssistant) -> Dict[str, ReolinkPush]:
+    """Return the push managers by webhook ID."""
+    return hass.data.setdefault(DOMAIN_DATA, {}).setdefault(WEBHOOKS, {})
+
+
 async def handle_webhook(hass, webhook_id, request):
     """Handle incoming webhook from Reolink for inbound messages and calls."""
 
@@ -570,53 +893,35 @@ async def handle_webhook(hass, webhook_id, request):
     if not request.body_exists:
         _LOGGER.warning("Webhook triggered without payload")
 
-    data = await request.text()
-    if not data:
-        _LOGGER.warning("Webhook triggered with unknown payload")
-        return
-
-    _LOGGER_DATA.debug("Webhook received payload: %s", data)
+    received = time.time()
+    capture = get_capture(hass)
+    keep_payload = capture is not None or _LOGGER_DATA.isEnabledFor(logging.DEBUG)
+    parser = OnvifNotificationParser()
+    payload = []
+    async for chunk in request.content.iter_any():
+        if keep_payload:
+            payload.append(chunk)
+        parser.feed(chunk)
+    events = parser.close()
+
+    if payload:
+        payload = b"".join(payload)
+        _LOGGER_DATA.debug("Webhook received payload: %s", payload.decode(errors="replace"))
+        if capture is not None:
+            hass.async_add_executor_job(
+                capture.write, KIND_WEBHOOK, {"webhook_id": webhook_id}, payload, received
+            )
 
-    matches = re.findall(r'Name="IsMotion" Value="(.+?)"', data)
-    if matches:
-        is_motion = matches[0] == "true"
-        _LOGGER_DATA.debug("Webhook received motion: %s", matches[0])
-    else:
+    if not any(event.object_type is not None for event in events):
         _LOGGER.warning("Webhook triggered with unknown payload")
         return
 
-    event_id = await get_event_by_webhook(hass, webhook_id)
-    if not event_id:
+    push = _webhooks(hass).get(webhook_id)
+    if push is None or not push.event_id:
         _LOGGER.error("Webhook triggered without event to fire")
-
-    hass.bus.async_fire(event_id, {"motion": is_motion})
-
-
-async def get_webhook_by_event(hass: HomeAssistant, event_id):
-    """Find the webhook_id by the event_id."""
-    try:
-        handlers = hass.data["webhook"]
-    except KeyError:
         return
 
-    for wid, info in handlers.items():
-        _LOGGER.debug("Webhook: %s", wid)
-        _LOGGER.debug(info)
-        if info["name"] == event_id:
-            return wid
-
-
-async def get_event_by_webhook(hass: HomeAssistant, webhook_id):
-    """Find the event_id by the webhook_id."""
-    try:
-        handlers = hass.data["webhook"]
-    except KeyError:
-        return
-
-    for wid, info in handlers.items():
-        if wid == webhook_id:
-            event_id = info["name"]
-            return event_id
+    push.async_add_onvif_events(events)
 
 
 def searchtime_to_datetime(self: SearchTime, timezone: dt.tzinfo):
@@ -631,20 +936,3 @@ def searchtime_to_datetime(self: SearchTime, timezone: dt.tzinfo):
         tzinfo=timezone,
     )
 
-
-last_known_hass: Optional[HomeAssistant] = None
-
-
-def callback_get_iohttp_session():
-    """Return the iohttp session for the last known hass instance."""
-    global last_known_hass
-    if last_known_hass is None:
-        raise Exception("No Home Assistant instance found")
-        
-    context = ssl.create_default_context()
-    context.set_ciphers("DEFAULT")
-    context.check_hostname = False
-    context.verify_mode = ssl.CERT_NONE
-    session = async_create_clientsession(last_known_hass, verify_ssl=False)
-    session.connector._ssl = context
-    return session
@@ -1,20 +1,28 @@
 """This component provides support for Reolink motion events."""
-import asyncio
 import datetime
 import logging
 import traceback
+from typing import Optional
 
-from homeassistant.core import HomeAssistant, Event
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
 from homeassistant.components.binary_sensor import BinarySensorEntity
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
 
 from .entity import ReolinkEntity, CoordinatorEntity
 from .const import BASE, DOMAIN, MOTION_UPDATE_COORDINATOR
 from .base import ReolinkBase
+from .breaker import CircuitOpenError
+from .scheduler import async_get_scheduler
+from .typings import CameraEvent
 
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_DEVICE_CLASS = "motion"
 
+# Notified object types by their key in the AI state of the API
+AI_STATE_KEYS = {"person": "people", "pet": "dog_cat"}
+
 
 async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices):
     """Set up the Reolink IP Camera switches."""
@@ -52,6 +60,9 @@ class MotionSensor(ReolinkEntity, BinarySensorEntity):
         self._event_state = False
         self._last_event_state = False
         self._last_motion = datetime.datetime.min
+        self._objects = None
+        self._motion_off_unsub: Optional[CALLBACK_TYPE] = None
+        self._motion_off_notified = False
 
     @property
     def unique_id(self):
@@ -85,6 +96,8 @@ class MotionSensor(ReolinkEntity, BinarySensorEntity):
 
     @property
     def available(self):
+        if not self._base.available:
+            return False
         # in case detection solely relies on callback, availability relies on active session state
         if self._base.motion_states_update_fallback_delay is None or self._base.motion_states_update_fallback_delay <= 0:
             return self._base.api.session_active
@@ -95,53 +108,48 @@ class MotionSensor(ReolinkEntity, BinarySensorEntity):
         """Return the class of this device."""
         return DEFAULT_DEVICE_CLASS
 
+    @property
+    def fingerprint(self):
+        """Return the values shown by the sensor, the object states included."""
+        return (self.is_on, tuple(sorted(self.extra_state_attributes.items())))
+
     async def async_added_to_hass(self) -> None:
         """Entity created."""
         await super().async_added_to_hass()
-        self.hass.bus.async_listen(self._base.event_id, self.handle_event)
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self._base.event_signal, self.handle_event)
+        )
 
-    async def handle_event(self, event):
+    async def handle_event(self, event: CameraEvent):
         """Handle incoming event for motion detection and availability."""
 
-        try:
-            self._available = event.data["available"]
-        except KeyError:
-            pass
+        if event.for_objects or not self._base.handles_event(event):
+            return
+
+        if event.available is not None:
+            self._available = event.available
 
         if not self._available:
-            if self._base.sensor_person_detection is not None and self._base.sensor_person_detection.available:
-                await self._base.sensor_person_detection.handle_event(
-                    Event(self._base.event_id, {"available": False}))
-            if self._base.sensor_vehicle_detection is not None and self._base.sensor_vehicle_detection.available:
-                await self._base.sensor_vehicle_detection.handle_event(
-                    Event(self._base.event_id, {"available": False}))
-            if self._base.sensor_pet_detection is not None and self._base.sensor_pet_detection.available:
-                await self._base.sensor_pet_detection.handle_event(
-                    Event(self._base.event_id, {"available": False}))
+            self._base.async_send_event(CameraEvent(available=False, for_objects=True))
             return
 
-        try:
-            self._last_event_state = bool(self._event_state)
-            self._event_state = event.data["motion"]
-        except KeyError:
+        if event.motion is None:
             return
+        self._last_event_state = bool(self._event_state)
+        self._event_state = event.motion
 
+        notified = self._notified_states(event)
+        self._objects = event.objects if notified else None
         try:
-            await self._base.api.get_all_motion_states()
-            self._event_state = self._base.api.motion_state
-        except:
-            _LOGGER.error("Motion states could not be queried from API")
-            _LOGGER.error(traceback.format_exc())
+            if not notified:
+                await self._base.get_all_motion_states()
+                self._event_state = self._base.api.motion_state
+        except Exception as ex:  # pylint: disable=broad-except
+            if not isinstance(ex, CircuitOpenError):
+                _LOGGER.error("Motion states could not be queried from API")
+                _LOGGER.error(traceback.format_exc())
             self._available = False
-            if self._base.sensor_person_detection is not None:
-                await self._base.sensor_person_detection.handle_event(
-                    Event(self._base.event_id, {"available": False}))
-            if self._base.sensor_vehicle_detection is not None:
-                await self._base.sensor_vehicle_detection.handle_event(
-                    Event(self._base.event_id, {"available": False}))
-            if self._base.sensor_pet_detection is not None:
-                await self._base.sensor_pet_detection.handle_event(
-                    Event(self._base.event_id, {"available": False}))
+            self._base.async_send_event(CameraEvent(available=False, for_objects=True))
             self.async_schedule_update_ha_state()
             return
 
@@ -150,26 +158,57 @@ class MotionSensor(ReolinkEntity, BinarySensorEntity):
             self.async_schedule_update_ha_state()
 
         if self._event_state:
+            self._cancel_motion_off()
             self._last_motion = datetime.datetime.now()
-        else:
-            if self._base.motion_off_delay > 0:
-                await asyncio.sleep(self._base.motion_off_delay)
+            async_get_scheduler(self.hass).async_mark_active(self._base.unique_id)
+        elif self._base.motion_off_delay > 0:
+            # Report the end of the motion when the off delay has passed, repeated
+            # reports of no motion (the fallback polls) do not postpone it
+            self._motion_off_notified = notified
+            if self._motion_off_unsub is None:
+                self._motion_off_unsub = async_call_later(
+                    self.hass, self._base.motion_off_delay, self._async_motion_off
+                )
+            return
 
-        if self._base.api.ai_state:
+        await self._async_update_objects(notified)
+
+    async def _async_motion_off(self, _now):
+        """Motion off delay passed without new motion."""
+        self._motion_off_unsub = None
+        await self._async_update_objects(self._motion_off_notified)
+
+    def _cancel_motion_off(self):
+        """Cancel a pending motion off report."""
+        if self._motion_off_unsub is not None:
+            self._motion_off_unsub()
+            self._motion_off_unsub = None
+
+    async def async_will_remove_from_hass(self):
+        """Entity removed."""
+        self._cancel_motion_off()
+        await super().async_will_remove_from_hass()
+
+    async def _async_update_objects(self, notified: bool):
+        """Hand the queried AI states to the object sensors and write the state."""
+        if self._base.api.ai_state and not notified:
             # send an event to AI based motion sensor entities
-            if self._base.sensor_person_detection is not None:
-                await self._base.sensor_person_detection.handle_event(
-                    Event(self._base.event_id, {"ai_refreshed": True, "available": True}))
-            if self._base.sensor_vehicle_detection is not None:
-                await self._base.sensor_vehicle_detection.handle_event(
-                    Event(self._base.event_id, {"ai_refreshed": True, "available": True}))
-            if self._base.sensor_pet_detection is not None:
-                await self._base.sensor_pet_detection.handle_event(
-                    Event(self._base.event_id, {"ai_refreshed": True, "available": True}))
+            self._base.async_send_event(
+                CameraEvent(ai_refreshed=True, available=True, for_objects=True)
+            )
 
         if self.enabled:
             self.async_schedule_update_ha_state()
 
+    def _notified_states(self, event: CameraEvent) -> bool:
+        """Return True if the notification tells all the states, no API query is needed."""
+        if event.objects is None:
+            return False
+        if self._base.api.is_nvr():
+            # The states of the channel of this sensor are queried from the NVR
+            return False
+        return bool(event.objects) or not self._base.api.is_ia_enabled
+
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
@@ -180,7 +219,10 @@ class MotionSensor(ReolinkEntity, BinarySensorEntity):
 
         attrs["bus_event_id"] = self._base.event_id
 
-        if self._base.api.ai_state:
+        if self._objects is not None:
+            for object_type, value in self._objects.items():
+                attrs[AI_STATE_KEYS.get(object_type, object_type)] = self._state and value
+        elif self._base.api.ai_state:
             for key, value in self._base.api.ai_state.items():
                 if key == "channel":
                     continue
@@ -275,6 +317,8 @@ class ObjectDetectedSensor(ReolinkEntity, BinarySensorEntity):
     @property
     def available(self):
         """Return True if entity is available."""
+        if not self._base.available:
+            return False
         if self._base.motion_states_update_fallback_delay is None or self._base.motion_states_update_fallback_delay <= 0:
             return self._base.api.ai_state and self._base.api.session_active
         return self._available
@@ -284,32 +328,49 @@ class ObjectDetectedSensor(ReolinkEntity, BinarySensorEntity):
         """Return the class of this device."""
         return DEFAULT_DEVICE_CLASS
 
+    @property
+    def fingerprint(self):
+        """Return the values shown by the sensor."""
+        return self.is_on
+
     async def async_added_to_hass(self) -> None:
         """Entity created."""
         await super().async_added_to_hass()
-        self.hass.bus.async_listen(self._base.event_id, self.handle_event)
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self._base.event_signal, self.handle_event)
+        )
 
-    async def handle_event(self, event):
+    async def handle_event(self, event: CameraEvent):
         """Handle incoming event for motion detection and availability."""
 
+        if not self._base.handles_event(event):
+            return
+
         new_availability = self._available
 
-        try:
-            new_availability = event.data["available"]
+        if event.available is not None:
+            new_availability = event.available
             if not new_availability:
                 if new_availability != self._available:
                     self._available = new_availability
                     self.async_schedule_update_ha_state()
                 return
-        except KeyError:
-            pass
 
-        if event.data.get("smtp") is self._object_type:
+        if self._object_type in event.smtp_objects:
             self._event_state = True
             if self.enabled:
                 self.async_schedule_update_ha_state()
 
-        if event.data.get("ai_refreshed") is not True:
+        objects = event.objects
+        if objects and self._object_type in objects and not self._base.api.is_nvr():
+            self._last_event_state = bool(self._event_state)
+            self._event_state = objects[self._object_type]
+            self._available = True
+            if self.enabled:
+                self.async_schedule_update_ha_state()
+            return
+
+        if not event.ai_refreshed:
             return
 
         self._last_event_state = bool(self._event_state)
@@ -339,13 +400,3 @@ class ObjectDetectedSensor(ReolinkEntity, BinarySensorEntity):
         if new_availability != self._available:
             self._available = new_availability
             self.async_schedule_update_ha_state()
-
-
-
-
-
-
-
-
-
-
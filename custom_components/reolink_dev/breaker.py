@@ -0,0 +1,141 @@
+"""This component stops requests to Reolink hosts that keep failing."""
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from reolink.exceptions import ReolinkError
+
+_LOGGER = logging.getLogger(__name__)
+
+# Consecutive failed requests that open the circuit
+FAILURE_THRESHOLD = 3
+# First delay before probing an open circuit, doubled after every failed probe
+PROBE_DELAY = 10
+PROBE_DELAY_MAX = 300
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ReolinkError):
+    """Raised when a request is refused because the host is considered offline."""
+
+
+class CircuitBreaker:
+    """Circuit breaker of one Reolink host.
+
+    After FAILURE_THRESHOLD consecutive connection failures the circuit opens
+    and requests fail at once instead of waiting for the timeout. While open,
+    the breaker probes the host itself (half-open) with an exponentially
+    growing delay, and closes again on the first successful probe.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, name: str, probe: Callable[[], Awaitable[None]]
+    ):
+        """Initialize the breaker, probe raises when the host is still unreachable."""
+        self._hass = hass
+        self._name = name
+        self._probe = probe
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._probe_delay = PROBE_DELAY
+        self._probe_handle: Optional[asyncio.TimerHandle] = None
+        self._listeners: List[CALLBACK_TYPE] = []
+
+    @property
+    def state(self) -> str:
+        """Return the state of the circuit."""
+        return self._state
+
+    @property
+    def is_closed(self) -> bool:
+        """Return True if requests are let through."""
+        return self._state == STATE_CLOSED
+
+    def check(self):
+        """Raise CircuitOpenError when requests may not be sent."""
+        if self._state != STATE_CLOSED:
+            raise CircuitOpenError(f"Host {self._name} is unreachable, request refused")
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> Callable[[], None]:
+        """Call back when the circuit opens or closes."""
+        self._listeners.append(update_callback)
+
+        @callback
+        def remove_listener():
+            if update_callback in self._listeners:
+                self._listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def record_success(self):
+        """Register a successful request."""
+        self._failures = 0
+        if self._state != STATE_CLOSED:
+            self._close()
+
+    @callback
+    def record_failure(self):
+        """Register a failed request, open the circuit when the threshold is reached."""
+        self._failures += 1
+        if self._state == STATE_CLOSED and self._failures >= FAILURE_THRESHOLD:
+            _LOGGER.warning(
+                "Host %s failed %d requests in a row, pausing requests for %d seconds",
+                self._name, self._failures, self._probe_delay
+            )
+            self._open()
+
+    @callback
+    def async_stop(self):
+        """Cancel a pending probe."""
+        if self._probe_handle is not None:
+            self._probe_handle.cancel()
+            self._probe_handle = None
+        self._listeners.clear()
+
+    def _open(self):
+        """Open the circuit and plan the next probe."""
+        changed = self._state == STATE_CLOSED
+        self._state = STATE_OPEN
+        self._probe_handle = self._hass.loop.call_later(
+            self._probe_delay, lambda: self._hass.async_create_task(self._async_probe())
+        )
+        if changed:
+            self._notify()
+
+    def _close(self):
+        """Close the circuit and forget the backoff."""
+        _LOGGER.info("Host %s is reachable again", self._name)
+        if self._probe_handle is not None:
+            self._probe_handle.cancel()
+            self._probe_handle = None
+        self._state = STATE_CLOSED
+        self._probe_delay = PROBE_DELAY
+        self._notify()
+
+    async def _async_probe(self):
+        """Let one request through to find out if the host is back."""
+        self._probe_handle = None
+        self._state = STATE_HALF_OPEN
+        try:
+            await self._probe()
+        except Exception as ex:  # pylint: disable=broad-except
+            self._probe_delay = min(self._probe_delay * 2, PROBE_DELAY_MAX)
+            _LOGGER.debug(
+                "Host %s probe failed (%s), next probe in %d seconds",
+                self._name, ex, self._probe_delay
+            )
+            self._open()
+            return
+        self.record_success()
+
+    def _notify(self):
+        """Inform the listeners about a change of the circuit."""
+        for update_callback in list(self._listeners):
+            update_callback()
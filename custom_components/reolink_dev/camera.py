@@ -15,6 +15,7 @@ from .const import (
     DOMAIN_DATA,
     LAST_EVENT,
     SERVICE_PTZ_CONTROL,
+    SERVICE_QUERY_EVENTS,
     SERVICE_QUERY_VOD,
     SERVICE_SET_BACKLIGHT,
     SERVICE_SET_DAYNIGHT,
@@ -22,7 +23,10 @@ from .const import (
     SUPPORT_PLAYBACK,
     SUPPORT_PTZ,
 )
+from .breaker import CircuitOpenError
 from .entity import ReolinkEntity
+from .history import EVENT_TYPES
+from .limiter import PRIORITY_INTERACTIVE, request_priority
 from .typings import VoDEvent
 
 _LOGGER = logging.getLogger(__name__)
@@ -79,6 +83,15 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
         SERVICE_QUERY_VOD,
         [SUPPORT_PLAYBACK],
     )
+    platform.async_register_entity_service(
+        SERVICE_QUERY_EVENTS,
+        {
+            vol.Required("event_id"): cv.string,
+            vol.Optional("limit"): cv.positive_int,
+            vol.Optional("event_type"): vol.In(EVENT_TYPES),
+        },
+        SERVICE_QUERY_EVENTS,
+    )
 
     async_add_devices([camera])
 
@@ -122,6 +135,8 @@ class ReolinkCamera(ReolinkEntity, Camera):
             "DYNAMICRANGECONTROL": "DynamicRangeControl",
             "OFF": "Off",
         }
+        self._sensitivity_presets = None
+        self._sensitivity_source = None
 
     @property
     def unique_id(self):
@@ -176,6 +191,28 @@ class ReolinkCamera(ReolinkEntity, Camera):
 
         return attrs
 
+    @property
+    def fingerprint(self):
+        """Return the values shown by the camera."""
+        api = self._base.api
+        last = None
+        if self.playback_support:
+            data: dict = self.hass.data.get(DOMAIN_DATA)
+            data = data.get(self._base.unique_id) if data else None
+            last = data.get(LAST_EVENT) if data else None
+        return (
+            self.state,
+            self.supported_features,
+            self.entity_picture,
+            api.motion_detection_state,
+            tuple(api.ptz_presets.items()) if api.ptz_support else None,
+            api.backlight_state,
+            api.daynight_state,
+            api.sensitivity_presets,
+            last.url if last else None,
+            last.thumbnail.exists if last and last.thumbnail else None,
+        )
+
     @property
     def supported_features(self):
         """Return supported features."""
@@ -194,7 +231,11 @@ class ReolinkCamera(ReolinkEntity, Camera):
         self, width: Union[int, None] = None, height: Union[int, None] = None
     ) -> Union[bytes, None]:
         """Return a still image response from the camera."""
-        return await self._base.api.get_snapshot()
+        try:
+            with request_priority(PRIORITY_INTERACTIVE):
+                return await self._base.api.get_snapshot()
+        except CircuitOpenError:
+            return None
 
     async def ptz_control(self, command, **kwargs):
         """Pass PTZ command to the camera."""
@@ -202,9 +243,10 @@ class ReolinkCamera(ReolinkEntity, Camera):
             _LOGGER.error("PTZ is not supported on this device")
             return
 
-        await self._base.api.set_ptz_command(
-            command=self._ptz_commands[command], **kwargs
-        )
+        with request_priority(PRIORITY_INTERACTIVE):
+            await self._base.api.set_ptz_command(
+                command=self._ptz_commands[command], **kwargs
+            )
 
     async def query_vods(self, event_id, **kwargs):
         """ Query camera for VoDs and emit results """
@@ -216,8 +258,22 @@ class ReolinkCamera(ReolinkEntity, Camera):
             event_id, self._entry_id, context=self._context, **kwargs
         )
 
+    async def query_events(self, event_id, limit=None, event_type=None):
+        """ Emit the recent detections of the camera """
+        self._hass.bus.async_fire(
+            event_id,
+            {
+                "entity_id": self.entity_id,
+                "events": self._base.history.entries(limit, event_type),
+            },
+            context=self._context,
+        )
+
     def get_sensitivity_presets(self):
-        """Get formatted sensitivity presets."""
+        """Get formatted sensitivity presets, reformatted only when the camera sent new ones."""
+        if self._base.api.sensitivity_presets is self._sensitivity_source:
+            return self._sensitivity_presets
+
         presets = list()
         preset = dict()
 
@@ -235,21 +291,26 @@ class ReolinkCamera(ReolinkEntity, Camera):
 
             presets.append(preset.copy())
 
+        self._sensitivity_source = self._base.api.sensitivity_presets
+        self._sensitivity_presets = presets
         return presets
 
     async def set_sensitivity(self, sensitivity, **kwargs):
         """Set the sensitivity to the camera."""
         if "preset" in kwargs:
             kwargs["preset"] += 1  # The camera preset ID's on the GUI are always +1
-        await self._base.api.set_sensitivity(value=sensitivity, **kwargs)
+        with request_priority(PRIORITY_INTERACTIVE):
+            await self._base.api.set_sensitivity(value=sensitivity, **kwargs)
 
     async def set_daynight(self, mode):
         """Set the day and night mode to the camera."""
-        await self._base.api.set_daynight(value=self._daynight_modes[mode])
+        with request_priority(PRIORITY_INTERACTIVE):
+            await self._base.api.set_daynight(value=self._daynight_modes[mode])
 
     async def set_backlight(self, mode):
         """Set the backlight mode to the camera."""
-        await self._base.api.set_backlight(value=self._backlight_modes[mode])
+        with request_priority(PRIORITY_INTERACTIVE):
+            await self._base.api.set_backlight(value=self._backlight_modes[mode])
 
     async def async_enable_motion_detection(self):
         """Predefined camera service implementation."""
@@ -0,0 +1,110 @@
+"""This component captures the raw event notifications of Reolink cameras for replay."""
+from dataclasses import dataclass
+import json
+import logging
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import CAPTURE, DOMAIN_DATA
+
+_LOGGER = logging.getLogger(__name__)
+
+KIND_WEBHOOK = 0
+KIND_SMTP = 1
+
+# Record header: capture time, kind, length of the JSON metadata, length of the payload
+_HEADER = struct.Struct("<dBHI")
+
+
+@dataclass
+class CaptureRecord:
+    """A notification as it was received."""
+
+    timestamp: float
+    kind: int
+    meta: dict
+    payload: bytes
+
+
+class EventCapture:
+    """Append the raw notifications to a capture file.
+
+    Every record is a fixed size header followed by the metadata needed to
+    hand the notification to its handler again (webhook ID, SMTP port and
+    addresses) and the payload as it was received. Records are written from
+    the executor and from the SMTP thread, never from the event loop.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the capture, the file is opened on the first record."""
+        self.path = path
+        self.records = 0
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self, kind: int, meta: dict, payload: bytes, timestamp: Optional[float] = None):
+        """Append a record."""
+        encoded = json.dumps(meta, separators=(",", ":")).encode()
+        header = _HEADER.pack(timestamp or time.time(), kind, len(encoded), len(payload))
+        with self._lock:
+            if self._closed:
+                return
+            if self._file is None:
+                self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+            self._file.write(header + encoded + payload)
+            self._file.flush()
+            self.records += 1
+
+    def close(self):
+        """Stop capturing and close the file."""
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_records(path: str) -> Iterator[CaptureRecord]:
+    """Read the records of a capture file, a truncated last record is ignored."""
+    with open(path, "rb") as file:
+        while True:
+            header = file.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return
+            timestamp, kind, meta_length, payload_length = _HEADER.unpack(header)
+            meta = file.read(meta_length)
+            payload = file.read(payload_length)
+            if len(meta) < meta_length or len(payload) < payload_length:
+                _LOGGER.warning("Capture %s ends with a truncated record", path)
+                return
+            yield CaptureRecord(timestamp, kind, json.loads(meta), payload)
+
+
+def get_capture(hass: HomeAssistant) -> Optional[EventCapture]:
+    """Return the running capture, if any."""
+    return hass.data.get(DOMAIN_DATA, {}).get(CAPTURE)
+
+
+@callback
+def async_start_capture(hass: HomeAssistant, path: str) -> EventCapture:
+    """Capture the notifications of all cameras to a file, replacing a running capture."""
+    async_stop_capture(hass)
+    capture = hass.data.setdefault(DOMAIN_DATA, {})[CAPTURE] = EventCapture(path)
+    _LOGGER.info("Capturing the camera notifications to %s", path)
+    return capture
+
+
+@callback
+def async_stop_capture(hass: HomeAssistant):
+    """Stop capturing the notifications."""
+    capture: Optional[EventCapture] = hass.data.get(DOMAIN_DATA, {}).pop(CAPTURE, None)
+    if capture is None:
+        return
+    _LOGGER.info("Captured %d camera notifications to %s", capture.records, capture.path)
+    # Closing waits for a record being written by the SMTP thread or executor
+    hass.async_add_executor_job(capture.close)
@@ -0,0 +1,157 @@
+"""This component merges bursts of motion events of a Reolink host."""
+import asyncio
+from dataclasses import dataclass
+import logging
+from typing import Callable, Dict, Hashable, Optional
+
+from homeassistant.core import HomeAssistant, callback
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _Burst:
+    """The events of one source (channel) within the current window."""
+
+    fired: dict
+    pending: Optional[dict] = None
+    merged: int = 0
+    handle: Optional[asyncio.TimerHandle] = None
+
+
+def merge_events(first: dict, second: dict) -> dict:
+    """Merge two motion events into one.
+
+    The motion state is the latest one known, the timestamp the earliest one
+    and the object types are the union of both, an object is detected if it
+    was detected in either event.
+    """
+    merged = {**first, **second}
+    if second.get("motion") is None:
+        merged["motion"] = first.get("motion")
+    merged["timestamp"] = min(first["timestamp"], second["timestamp"])
+    if "objects" in first or "objects" in second:
+        objects = dict(first.get("objects", {}))
+        for object_type, state in second.get("objects", {}).items():
+            objects[object_type] = objects.get(object_type, False) or state
+        merged["objects"] = objects
+    merged["smtp_objects"] = sorted({*first["smtp_objects"], *second["smtp_objects"]})
+    merged["sources"] = first["sources"] + [
+        source for source in second["sources"] if source not in first["sources"]
+    ]
+    return merged
+
+
+def _is_duplicate(fired: dict, data: dict) -> bool:
+    """Return True if an event tells nothing the fired event did not tell already."""
+    if data.get("motion") is not None and data["motion"] != fired.get("motion"):
+        return False
+    detected = {key for key, value in fired.get("objects", {}).items() if value}
+    detected.update(fired["smtp_objects"])
+    cleared = {key for key, value in fired.get("objects", {}).items() if not value}
+    for object_type, state in data.get("objects", {}).items():
+        if object_type not in (detected if state else cleared):
+            return False
+    return set(data["smtp_objects"]) <= detected
+
+
+class EventCoalescer:
+    """Merge the motion events of a host arriving within a window.
+
+    The first event of a burst is fired at once. The events following it
+    within the window are merged, and fired as one event when the window
+    closes, unless they do not change the state that was fired already (a
+    webhook and an e-mail for the same detection, repeated notifications).
+    Events of different sources (channels of an NVR) are merged separately.
+
+    Object types detected by e-mail are passed as the smtp_objects list, next
+    to the smtp key of the last e-mail the automations fired by the event use.
+    The notification sources (webhook, pull point, e-mail) are passed as the
+    sources list.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, window: float, fire: Callable[[dict], None], name: str = ""
+    ):
+        """Initialize the coalescer, fire is called with the event data to fire."""
+        self._hass = hass
+        self._name = name
+        self._fire = fire
+        self.window = window
+        self._bursts: Dict[Hashable, _Burst] = {}
+        self.received = 0
+        self.fired = 0
+        self.dropped = 0
+
+    @property
+    def counters(self) -> dict:
+        """Return the event counters."""
+        return {"received": self.received, "fired": self.fired, "dropped": self.dropped}
+
+    @callback
+    def async_add_event(self, data: dict, source: Hashable = None):
+        """Add an event, fire it now or merge it into the current burst."""
+        self.received += 1
+        smtp = data.get("smtp")
+        notification_source = data.get("source")
+        data = {
+            **data,
+            "timestamp": data.get("timestamp") or dt_util.utcnow().isoformat(),
+            "smtp_objects": [smtp] if smtp else [],
+            "sources": [notification_source] if notification_source else [],
+        }
+        data.pop("source", None)
+
+        burst = self._bursts.get(source)
+        if burst is None or self.window <= 0:
+            self._async_fire(data)
+            if self.window > 0:
+                self._bursts[source] = burst = _Burst(fired=data)
+                self._arm(burst, source)
+            return
+
+        burst.merged += 1
+        burst.pending = data if burst.pending is None else merge_events(burst.pending, data)
+
+    @callback
+    def async_stop(self):
+        """Drop the pending bursts."""
+        for burst in self._bursts.values():
+            if burst.handle is not None:
+                burst.handle.cancel()
+        self._bursts.clear()
+
+    def _arm(self, burst: _Burst, source: Hashable):
+        """Close the window of a burst after the window length."""
+        burst.handle = self._hass.loop.call_later(self.window, self._close, source)
+
+    @callback
+    def _close(self, source: Hashable):
+        """Fire the merged events of a window if they change the state."""
+        burst = self._bursts.pop(source)
+        if burst.pending is None:
+            return
+
+        if _is_duplicate(burst.fired, burst.pending):
+            self.dropped += burst.merged
+            _LOGGER.debug(
+                "Host %s dropped %d duplicate motion event(s), %d received, %d fired and %d dropped in total",
+                self._name, burst.merged, self.received, self.fired, self.dropped,
+            )
+            return
+
+        self.dropped += burst.merged - 1
+        _LOGGER.debug(
+            "Host %s merged %d motion event(s), %d received, %d fired and %d dropped in total",
+            self._name, burst.merged, self.received, self.fired + 1, self.dropped,
+        )
+        self._async_fire(burst.pending)
+        # The merged event starts a new window, a burst never fires more than once per window
+        self._bursts[source] = burst = _Burst(fired=burst.pending)
+        self._arm(burst, source)
+
+    def _async_fire(self, data: dict):
+        """Fire an event."""
+        self.fired += 1
+        self._fire(data)
@@ -30,6 +30,9 @@ from .const import (
     CONF_THUMBNAIL_PATH,
     CONF_MOTION_STATES_UPDATE_FALLBACK_DELAY,
     CONF_ONVIF_SUBSCRIPTION_DISABLED,
+    CONF_ONVIF_PULL_POINT,
+    CONF_FAST_STARTUP,
+    CONF_EVENT_WINDOW,
     DEFAULT_SMTP_PORT,
     DEFAULT_MOTION_OFF_DELAY,
     DEFAULT_USE_HTTPS,
@@ -41,6 +44,9 @@ from .const import (
     DEFAULT_TIMEOUT,
     DEFAULT_MOTION_STATES_UPDATE_FALLBACK_DELAY,
     DEFAULT_ONVIF_SUBSCRIPTION_DISABLED,
+    DEFAULT_ONVIF_PULL_POINT,
+    DEFAULT_FAST_STARTUP,
+    DEFAULT_EVENT_WINDOW,
     DOMAIN,
 )
 
@@ -208,6 +214,12 @@ class ReolinkOptionsFlowHandler(config_entries.OptionsFlow):
                             CONF_ONVIF_SUBSCRIPTION_DISABLED, DEFAULT_ONVIF_SUBSCRIPTION_DISABLED
                         ),
                     ): vol.All(vol.Coerce(bool)),
+                    vol.Required(
+                        CONF_ONVIF_PULL_POINT,
+                        default=self.config_entry.options.get(
+                            CONF_ONVIF_PULL_POINT, DEFAULT_ONVIF_PULL_POINT
+                        ),
+                    ): vol.All(vol.Coerce(bool)),
                     vol.Required(
                         CONF_MOTION_STATES_UPDATE_FALLBACK_DELAY,
                         default=self.config_entry.options.get(
@@ -232,6 +244,18 @@ class ReolinkOptionsFlowHandler(config_entries.OptionsFlow):
                             CONF_TIMEOUT, DEFAULT_TIMEOUT
                         ),
                     ): vol.All(vol.Coerce(int), vol.Range(min=1, max=60)),
+                    vol.Required(
+                        CONF_FAST_STARTUP,
+                        default=self.config_entry.options.get(
+                            CONF_FAST_STARTUP, DEFAULT_FAST_STARTUP
+                        ),
+                    ): vol.All(vol.Coerce(bool)),
+                    vol.Required(
+                        CONF_EVENT_WINDOW,
+                        default=self.config_entry.options.get(
+                            CONF_EVENT_WINDOW, DEFAULT_EVENT_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0, max=10)),
                 }
             ),
         )
@@ -7,12 +7,40 @@ COORDINATOR = "coordinator"
 MOTION_UPDATE_COORDINATOR = "motion_update_coordinator"
 BASE = "base"
 PUSH_MANAGER = "push_manager"
+HOST_SESSION = "host_session"
 SESSION_RENEW_THRESHOLD = 300
+MOTION_STATES_MAX_AGE = 0.3
 MEDIA_SOURCE = "media_source"
 THUMBNAIL_VIEW = "thumbnail_view"
 SHORT_TOKENS = "short_tokens"
 LONG_TOKENS = "long_tokens"
 LAST_EVENT = "last_event"
+SCHEDULER = "scheduler"
+SETUP_TIMES = "setup_times"
+WEBHOOKS = "webhooks"
+SMTP_SERVER = "smtp_server"
+RENEWER = "renewer"
+CAPTURE = "capture"
+CACHE_SAVE_DELAY = 10
+SWITCH_WRITE_DELAY = 0.5
+SNAPSHOT_CACHE_SIZE = 4
+SNAPSHOT_MATCH_SLACK = 10
+EVENT_HISTORY_SIZE = 100
+
+POLL_MAX_CONCURRENT = 4
+POLL_JITTER = 0.1
+POLL_ERROR_BACKOFF_MAX = 8
+POLL_IDLE_AFTER = 900
+POLL_IDLE_FACTOR = 2
+
+PULL_POINT_TIMEOUT = 60
+PULL_POINT_MESSAGE_LIMIT = 100
+PULL_POINT_ERROR_BACKOFF_MAX = 60
+
+RENEW_RETRY = 60
+RENEW_MIN_DELAY = 10
+RENEW_SPACING = 5
+RENEW_ERROR_BACKOFF_MAX = 8
 
 CONF_USE_HTTPS = "use_https"
 CONF_STREAM = "stream"
@@ -25,6 +53,9 @@ CONF_PLAYBACK_MONTHS = "playback_months"
 CONF_THUMBNAIL_PATH = "playback_thumbnail_path"
 CONF_MOTION_STATES_UPDATE_FALLBACK_DELAY = "motion_states_update_fallback_delay"
 CONF_ONVIF_SUBSCRIPTION_DISABLED = "onvif_subscription_disabled"
+CONF_ONVIF_PULL_POINT = "onvif_pull_point"
+CONF_FAST_STARTUP = "fast_startup"
+CONF_EVENT_WINDOW = "event_window"
 
 DEFAULT_USE_HTTPS = True
 DEFAULT_CHANNEL = 1
@@ -35,8 +66,13 @@ DEFAULT_STREAM = "main"
 DEFAULT_STREAM_FORMAT = "h264"
 DEFAULT_MOTION_STATES_UPDATE_FALLBACK_DELAY = 30
 DEFAULT_ONVIF_SUBSCRIPTION_DISABLED = False
+DEFAULT_ONVIF_PULL_POINT = False
+DEFAULT_FAST_STARTUP = False
+DEFAULT_EVENT_WINDOW = 0.5
 
 DEFAULT_TIMEOUT = 30
+# Seconds the first connection of a camera may take with fast startup, all of its requests together
+STARTUP_BUDGET = 60
 DEFAULT_PLAYBACK_MONTHS = 2
 DEFAULT_THUMBNAIL_OFFSET = 6
 DEFAULT_THUMBNAIL_PATH = "/"
@@ -50,8 +86,14 @@ SERVICE_SET_DAYNIGHT = "set_daynight"
 SERVICE_SET_SENSITIVITY = "set_sensitivity"
 
 SERVICE_QUERY_VOD = "query_vods"
+SERVICE_QUERY_EVENTS = "query_events"
+
+ATTR_FILENAME = "filename"
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
 
 THUMBNAIL_EXTENSION = "jpg"
+CAPTURE_FILENAME = "reolink_dev_capture.bin"
 
 THUMBNAIL_URL = "/api/" + DOMAIN + "/media_proxy/{camera_id}/{event_id}.jpg"
 VOD_URL = "/api/" + DOMAIN + "/vod/{camera_id}/{event_id}"
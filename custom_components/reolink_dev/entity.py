@@ -1,6 +1,8 @@
 """Reolink parent entity class."""
 
-from homeassistant.core import HomeAssistant
+from typing import Any, Optional
+
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import CONNECTION_NETWORK_MAC
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -9,7 +11,11 @@ from .base import ReolinkBase
 
 
 class ReolinkEntity(CoordinatorEntity):
-    """Parent class for Reolink Entities."""
+    """Parent class for Reolink Entities.
+
+    Entities defining a fingerprint only write their state after a
+    coordinator update when the fingerprint changed.
+    """
 
     def __init__(self, hass: HomeAssistant, config):
         """Initialize common aspects of a Reolink entity."""
@@ -19,6 +25,7 @@ class ReolinkEntity(CoordinatorEntity):
         self._base: ReolinkBase = hass.data[DOMAIN][config.entry_id][BASE]
         self._hass = hass
         self._state = False
+        self._fingerprint: Optional[tuple] = None
 
     @property
     def device_info(self):
@@ -36,7 +43,33 @@ class ReolinkEntity(CoordinatorEntity):
     @property
     def available(self):
         """Return True if entity is available."""
-        return self._base.api.session_active
+        return self._base.available and self._base.api.session_active
+
+    @property
+    def fingerprint(self) -> Any:
+        """Return a cheap summary of the values shown by the entity, None to always write."""
+        return None
+
+    @callback
+    def async_write_ha_state(self):
+        """Write the state and remember the values it was written with."""
+        self._fingerprint = self._current_fingerprint()
+        super().async_write_ha_state()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Skip the write when the values of the entity did not change."""
+        fingerprint = self._current_fingerprint()
+        if fingerprint is not None and fingerprint == self._fingerprint:
+            return
+        self.async_write_ha_state()
+
+    def _current_fingerprint(self) -> Optional[tuple]:
+        """Return the fingerprint along with the availability."""
+        fingerprint = self.fingerprint
+        if fingerprint is None:
+            return None
+        return (self.available, fingerprint)
 
     async def request_refresh(self):
         """Call the coordinator to update the API."""
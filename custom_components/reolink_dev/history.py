@@ -0,0 +1,105 @@
+"""This component keeps the recent motion and AI detections of a Reolink camera."""
+from array import array
+from datetime import datetime
+import time
+from typing import List, Optional
+
+import homeassistant.util.dt as dt_util
+
+# Detected object types and notification sources, stored by their index
+EVENT_TYPES = ("motion", "person", "vehicle", "pet", "face")
+EVENT_SOURCES = ("unknown", "webhook", "pull_point", "smtp")
+
+SOURCE_UNKNOWN = "unknown"
+SOURCE_WEBHOOK = "webhook"
+SOURCE_PULL_POINT = "pull_point"
+SOURCE_SMTP = "smtp"
+
+
+class EventHistory:
+    """Fixed size ring buffer of the detections of a camera.
+
+    A detection is stored as a timestamp and three byte sized indices (type,
+    channel, source) in preallocated arrays, so a full buffer costs 11 bytes
+    per detection and adding one never allocates.
+    """
+
+    def __init__(self, size: int):
+        """Initialize an empty buffer of size detections."""
+        self._size = size
+        self._timestamps = array("d", bytes(8 * size))
+        self._types = array("B", bytes(size))
+        self._channels = array("B", bytes(size))
+        self._sources = array("B", bytes(size))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Return the number of detections kept."""
+        return self._count
+
+    def add(self, event_type: str, channel: int, source: str, timestamp: Optional[float] = None):
+        """Add a detection, unknown types and sources are ignored."""
+        if event_type not in EVENT_TYPES or source not in EVENT_SOURCES:
+            return
+        index = self._next
+        self._timestamps[index] = timestamp or time.time()
+        self._types[index] = EVENT_TYPES.index(event_type)
+        self._channels[index] = channel & 0xFF
+        self._sources[index] = EVENT_SOURCES.index(source)
+        self._next = (index + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+
+    def add_event(self, data: dict, channel: int):
+        """Add the detections of a (merged) motion event, nothing if it ends the motion.
+
+        Every detected object type is a detection, motion only when no object
+        was detected with it.
+        """
+        motion = data.get("motion")
+        if motion is False:
+            return
+
+        timestamp = None
+        if data.get("timestamp"):
+            try:
+                timestamp = datetime.fromisoformat(data["timestamp"]).timestamp()
+            except ValueError:
+                pass
+        sources = data.get("sources") or [SOURCE_UNKNOWN]
+        source = next((source for source in sources if source != SOURCE_SMTP), sources[0])
+
+        detected = [
+            object_type
+            for object_type, state in (data.get("objects") or {}).items()
+            if state and object_type != "motion"
+        ]
+        for object_type in detected:
+            self.add(object_type, channel, source, timestamp)
+        for object_type in data.get("smtp_objects", []):
+            if object_type not in detected:
+                self.add(object_type, channel, SOURCE_SMTP, timestamp)
+                detected.append(object_type)
+        if not detected and motion:
+            self.add("motion", channel, source, timestamp)
+
+    def entries(self, limit: Optional[int] = None, event_type: Optional[str] = None) -> List[dict]:
+        """Return the detections, the most recent first."""
+        entries = []
+        for offset in range(1, self._count + 1):
+            if limit is not None and len(entries) >= limit:
+                break
+            index = (self._next - offset) % self._size
+            type_name = EVENT_TYPES[self._types[index]]
+            if event_type is not None and type_name != event_type:
+                continue
+            entries.append(
+                {
+                    "timestamp": dt_util.utc_from_timestamp(self._timestamps[index]).isoformat(),
+                    "type": type_name,
+                    "channel": self._channels[index],
+                    "source": EVENT_SOURCES[self._sources[index]],
+                }
+            )
+        return entries
+
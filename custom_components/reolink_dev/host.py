@@ -0,0 +1,490 @@
+"""This component shares one Reolink API session per host (camera or NVR)."""
+import asyncio
+import json
+import logging
+import ssl
+from typing import Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+import async_timeout
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+
+from reolink.camera_api import Api
+
+from .breaker import CircuitBreaker
+from .limiter import PriorityLimiter, get_request_priority
+from .const import DOMAIN, HOST_SESSION
+
+_LOGGER = logging.getLogger(__name__)
+
+# Reolink firmware starts failing requests when too many are in flight
+CONNECTION_LIMIT = 4
+# Close idle connections before the embedded web server of the camera does
+KEEPALIVE_TIMEOUT = 15
+# Requests in flight per host, Reolink firmware returns errors above a few
+REQUEST_CONCURRENCY = 3
+# Upper bound of the commands merged into one request
+BATCH_COMMAND_LIMIT = 256
+# Responses describing the device, persisted for warm restarts. Settings (FTP, e-mail, push,
+# recording, alarm...) are not: they can hold server credentials and change while offline
+CACHED_COMMANDS = {
+    "GetDevInfo",
+    "GetLocalLink",
+    "GetNetPort",
+    "GetAbility",
+    "GetHddInfo",
+    "GetPtzPreset",
+}
+API_VERSIONS = ("getrec", "getftp", "getpush", "getalarm")
+
+
+def _set_result(future: asyncio.Future, result):
+    """Hand a caller its response, unless it stopped waiting (timed out)."""
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, ex: Exception):
+    """Hand a caller an error, unless it stopped waiting (timed out)."""
+    if not future.done():
+        future.set_exception(ex)
+
+
+class ReolinkHost:
+    """A login session shared by all the channels of one Reolink host.
+
+    An NVR is configured with one config entry per channel. Instead of every
+    channel logging in with its own token, all channel APIs of the host
+    borrow the token of this session, so the host only sees one login and one
+    token renewal no matter how many channels are configured.
+
+    The session also owns the HTTP connection pool of the host: one SSL
+    context and one keep-alive connector, so requests reuse established
+    (TLS) connections instead of doing a handshake per request.
+
+    Command requests of all channels issued in the same event loop tick are
+    merged into one POST, the Reolink API accepts a list of commands and
+    answers with a list of results in the same order.
+
+    The states of all channels are polled together: one channel asking for
+    its states fetches those of every channel in one batch, and the other
+    channels are handed the result through their listeners.
+
+    All requests pass the circuit breaker of the host, so an offline host
+    fails fast instead of making every caller wait for the timeout.
+
+    At most REQUEST_CONCURRENCY requests are in flight per host, waiting
+    requests are served by priority (see limiter.py).
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host,
+        port,
+        username,
+        password,
+        use_https,
+        timeout,
+    ):  # pylint: disable=too-many-arguments
+        """Initialize the host session."""
+        self._hass = hass
+        self._host = host
+        self._port = port
+        self._username = username
+        self._password = password
+        self._use_https = use_https
+        self._timeout = timeout
+
+        self._ssl_context: Optional[ssl.SSLContext] = None
+        self._aiohttp_session: Optional[aiohttp.ClientSession] = None
+
+        self._login_lock = asyncio.Lock()
+        self._members: List["ReolinkChannelApi"] = []
+
+        self._batch: List[Tuple["ReolinkChannelApi", list, asyncio.Future, int]] = []
+        self._batch_scheduled = False
+
+        self._states_request: Optional[asyncio.Task] = None
+        self._states_listeners: Dict["ReolinkChannelApi", CALLBACK_TYPE] = {}
+
+        self._session = Api(
+            host,
+            port,
+            username,
+            password,
+            use_https=use_https,
+            timeout=timeout,
+            aiohttp_get_session_callback=self.get_session,
+        )
+
+        self.breaker = CircuitBreaker(hass, host, self._async_probe)
+        self.limiter = PriorityLimiter(REQUEST_CONCURRENCY)
+
+    @staticmethod
+    def registry_key(host, port, username):
+        """Return the key of the host session in hass.data."""
+        return f"{HOST_SESSION}-{host}:{port}-{username}"
+
+    @classmethod
+    def get(
+        cls, hass: HomeAssistant, host, port, username, password, use_https, timeout
+    ):  # pylint: disable=too-many-arguments
+        """Get the session of the host, create it when there is none yet."""
+        data = hass.data.setdefault(DOMAIN, {})
+        key = cls.registry_key(host, port, username)
+        session = data.get(key)
+        if session is None:
+            session = cls(hass, host, port, username, password, use_https, timeout)
+            data[key] = session
+        return session
+
+    @property
+    def host(self):
+        """Return the host address."""
+        return self._host
+
+    @property
+    def member_count(self):
+        """Return the number of channel APIs using this session."""
+        return len(self._members)
+
+    def channel_api(self, channel, **kwargs) -> "ReolinkChannelApi":
+        """Hand out an API view on one channel of the host."""
+        api = ReolinkChannelApi(
+            self,
+            self._host,
+            self._port,
+            self._username,
+            self._password,
+            use_https=self._use_https,
+            channel=channel,
+            aiohttp_get_session_callback=self.get_session,
+            **kwargs,
+        )
+        self._members.append(api)
+        return api
+
+    @property
+    def ssl_context(self) -> ssl.SSLContext:
+        """Return the SSL context, created once as it is expensive to build."""
+        if self._ssl_context is None:
+            context = ssl.create_default_context()
+            context.set_ciphers("DEFAULT")
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            self._ssl_context = context
+        return self._ssl_context
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled HTTP session of the host (aiohttp_get_session_callback)."""
+        if self._aiohttp_session is None or self._aiohttp_session.closed:
+            # Not the session shared by Home Assistant, its connector lacks the ciphers of older firmware
+            self._aiohttp_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    ssl=self.ssl_context,
+                    limit=CONNECTION_LIMIT,
+                    keepalive_timeout=KEEPALIVE_TIMEOUT,
+                    enable_cleanup_closed=True,
+                )
+            )
+        return self._aiohttp_session
+
+    def request_timeout(self) -> async_timeout.Timeout:
+        """Return the timeout of a request, applied per request so it can change at any time."""
+        return async_timeout.timeout(self._timeout)
+
+    async def set_timeout(self, timeout):
+        """Set the request timeout, it applies from the next request on."""
+        self._timeout = timeout
+
+    async def close_session(self):
+        """Close the pooled HTTP connections of the host."""
+        if self._aiohttp_session is not None:
+            session = self._aiohttp_session
+            self._aiohttp_session = None
+            await session.close()
+
+    async def login(self):
+        """Login once for all channels, a running login is awaited instead of repeated."""
+        async with self._login_lock:
+            if self._session.session_active:
+                return True
+            async with self.request_timeout():
+                return await self._session.login()
+
+    @property
+    def token(self):
+        """Return the token of the shared session."""
+        return self._session._token  # pylint: disable=protected-access
+
+    @property
+    def lease_time(self):
+        """Return the lease time of the shared session."""
+        return self._session._lease_time  # pylint: disable=protected-access
+
+    async def _async_probe(self):
+        """Send a light request, raises when the host is still unreachable."""
+        async with self.request_timeout():
+            response = await self._session.send(
+                [{"cmd": "GetDevInfo", "action": 0, "param": {"channel": 0}}]
+            )
+        if not response:
+            raise ConnectionError("login failed")
+
+    def invalidate(self, token):
+        """Drop the shared token when a channel found it to be rejected."""
+        if token is not None and token == self.token:
+            self._session.clear_token()
+
+    async def send_batched(self, api: "ReolinkChannelApi", body: list):
+        """Queue the commands of a channel, they are sent together with the other commands of this tick."""
+        future = self._hass.loop.create_future()
+        self._batch.append((api, body, future, get_request_priority()))
+        if not self._batch_scheduled:
+            self._batch_scheduled = True
+            self._hass.loop.call_soon(self._flush_batch)
+        return await future
+
+    def _flush_batch(self):
+        """Split the queued commands into requests and send them."""
+        self._batch_scheduled = False
+        batch, self._batch = self._batch, []
+
+        chunk = []
+        commands = 0
+        for item in batch:
+            if chunk and commands + len(item[1]) > BATCH_COMMAND_LIMIT:
+                self._hass.async_create_task(self._send_batch(chunk))
+                chunk = []
+                commands = 0
+            chunk.append(item)
+            commands += len(item[1])
+        if chunk:
+            self._hass.async_create_task(self._send_batch(chunk))
+
+    async def _send_batch(self, batch):
+        """Send a batch as one request and hand every caller its part of the response."""
+        # Callers that timed out are not waited for
+        batch = [item for item in batch if not item[2].done()]
+        if not batch:
+            return
+        priority = min(item[3] for item in batch)
+        if len(batch) == 1:
+            api, body, future, _ = batch[0]
+            try:
+                result = await api.send_direct(body, priority=priority)
+            except Exception as ex:  # pylint: disable=broad-except
+                _set_exception(future, ex)
+            else:
+                _set_result(future, result)
+            return
+
+        api = batch[0][0]
+        body = [command for _, commands, _, _ in batch for command in commands]
+        _LOGGER.debug(
+            "Host %s: sending %d commands of %d requests in one batch",
+            self._host, len(body), len(batch)
+        )
+
+        try:
+            response = await api.send_direct(body, priority=priority)
+        except Exception as ex:  # pylint: disable=broad-except
+            for _, _, future, _ in batch:
+                _set_exception(future, ex)
+            return
+
+        try:
+            json_data = json.loads(response)
+        except (TypeError, json.JSONDecodeError):
+            json_data = None
+
+        if not isinstance(json_data, list) or len(json_data) != len(body):
+            # No response, or one that cannot be matched to the callers
+            if response is None or response is False:
+                for _, _, future, _ in batch:
+                    _set_result(future, response)
+                return
+            _LOGGER.debug("Host %s: batch response mismatch, resending separately", self._host)
+            await asyncio.gather(*[self._send_batch([item]) for item in batch])
+            return
+
+        index = 0
+        for _, commands, future, _ in batch:
+            _set_result(future, json.dumps(json_data[index:index + len(commands)]))
+            index += len(commands)
+
+    @callback
+    def async_add_states_listener(
+        self, api: "ReolinkChannelApi", update_callback: CALLBACK_TYPE
+    ) -> Callable[[], None]:
+        """Call back when the states of the channel were fetched on behalf of another channel."""
+        self._states_listeners[api] = update_callback
+
+        @callback
+        def remove_listener():
+            if self._states_listeners.get(api) is update_callback:
+                self._states_listeners.pop(api)
+
+        return remove_listener
+
+    async def update_states(self, api: "ReolinkChannelApi"):
+        """Fetch the states of all channels, callers during a running fetch share it."""
+        if self._states_request is None:
+            self._states_request = self._hass.async_create_task(
+                self._async_update_states(api)
+            )
+        return await asyncio.shield(self._states_request)
+
+    async def _async_update_states(self, requester: "ReolinkChannelApi"):
+        """Fetch the states of all channels in one batch and notify the other channels."""
+        members = list(self._members)
+        try:
+            results = await asyncio.gather(*[api.get_states() for api in members])
+        finally:
+            self._states_request = None
+
+        for api, success in zip(members, results):
+            listener = self._states_listeners.get(api)
+            if success and api is not requester and listener is not None:
+                listener()
+
+        return results[members.index(requester)] if requester in members else all(results)
+
+    async def release(self, api: "ReolinkChannelApi"):
+        """Release a channel API, logout when the last one is gone."""
+        if api in self._members:
+            self._members.remove(api)
+        self._states_listeners.pop(api, None)
+
+        if self._members:
+            return
+
+        _LOGGER.debug("Last channel of host %s released, logging out", self._host)
+        self.breaker.async_stop()
+        data = self._hass.data.get(DOMAIN, {})
+        key = self.registry_key(self._host, self._port, self._username)
+        if data.get(key) is self:
+            data.pop(key)
+        # A host that never logged in (unreachable at setup) is not waited for again
+        if self._session.session_active:
+            try:
+                async with self.request_timeout():
+                    await self._session.logout()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.debug("Host %s: logout failed", self._host)
+        await self.close_session()
+
+
+class ReolinkChannelApi(Api):
+    """Reolink API of one channel, borrowing the token of its host session."""
+
+    def __init__(self, host_session: ReolinkHost, *args, **kwargs):
+        """Initialize the channel API."""
+        self._cached_responses: Dict[str, dict] = {}
+        super().__init__(*args, **kwargs)
+        self._host_session = host_session
+        self.motion_states_fetched = False
+
+    def map_json_response(self, json_data):
+        """Map the JSON objects and keep the ones describing the device for the cache."""
+        for data in json_data:
+            if not isinstance(data, dict) or data.get("code") != 0:
+                continue
+            if data.get("cmd") in CACHED_COMMANDS:
+                self._cached_responses[data["cmd"]] = data
+            elif data.get("cmd") == "GetMdState":
+                self.motion_states_fetched = True
+        super().map_json_response(json_data)
+
+    async def get_all_motion_states(self):
+        """Fetch the motion and AI states, motion_states_fetched tells if they were."""
+        self.motion_states_fetched = False
+        return await super().get_all_motion_states()
+
+    @property
+    def email_sender(self) -> Optional[str]:
+        """Return the sender address of the alarm e-mails."""
+        if not self._email_settings:
+            return None
+        return self._email_settings.get("value", {}).get("Email", {}).get("userName") or None
+
+    @property
+    def cache_data(self) -> dict:
+        """Return the device description to persist."""
+        return {
+            "responses": list(self._cached_responses.values()),
+            "api_versions": {
+                version: getattr(self, f"_api_version_{version}") for version in API_VERSIONS
+            },
+            "ia_enabled": self._is_ia_enabled,
+        }
+
+    def restore_cache(self, data: dict) -> bool:
+        """Restore the device description persisted by an earlier run."""
+        responses = data.get("responses", [])
+        commands = {response.get("cmd") for response in responses}
+        if "GetDevInfo" not in commands or "GetLocalLink" not in commands:
+            return False
+
+        self.map_json_response(responses)
+        for version, value in data.get("api_versions", {}).items():
+            if version in API_VERSIONS:
+                setattr(self, f"_api_version_{version}", value)
+        self._is_ia_enabled = data.get("ia_enabled", False)
+        return True
+
+    async def login(self):
+        """Use the token of the host session, login on the host when required."""
+        if self.session_active:
+            return True
+
+        if not await self._host_session.login():
+            return False
+
+        self._token = self._host_session.token
+        self._lease_time = self._host_session.lease_time
+        return self._token is not None
+
+    def clear_token(self):
+        """Initialize the token and let the host session know it is no longer valid."""
+        token = self._token
+        super().clear_token()
+        self._host_session.invalidate(token)
+
+    async def send(self, body, param=None, expected_content_type=None):
+        """Send a request, plain command lists are batched with the other channels of the host."""
+        self._host_session.breaker.check()
+        if body and body[0]["cmd"] in ("Login", "Logout"):
+            async with self._host_session.request_timeout():
+                return await super().send(body, param, expected_content_type)
+        if body and not param and expected_content_type is None:
+            return await self._host_session.send_batched(self, body)
+        return await self.send_direct(body, param, expected_content_type)
+
+    async def send_direct(self, body, param=None, expected_content_type=None, priority=None):
+        """Send a request without batching, through the circuit breaker and limiter of the host."""
+        breaker = self._host_session.breaker
+        limiter = self._host_session.limiter
+        breaker.check()
+
+        await limiter.acquire(get_request_priority() if priority is None else priority)
+        try:
+            # The circuit may have opened while waiting
+            breaker.check()
+            async with self._host_session.request_timeout():
+                response = await super().send(body, param, expected_content_type)
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            breaker.record_failure()
+            raise
+        finally:
+            limiter.release()
+        breaker.record_success()
+        return response
+
+    async def logout(self):
+        """Release the channel, the host session logs out with its last channel."""
+        self._token = None
+        self._lease_time = None
+        await self._host_session.release(self)
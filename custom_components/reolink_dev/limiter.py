@@ -0,0 +1,77 @@
+"""This component limits and prioritizes the requests to a Reolink host."""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+import heapq
+import itertools
+from typing import List, Tuple
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+_REQUEST_PRIORITY: ContextVar[int] = ContextVar(
+    "reolink_request_priority", default=PRIORITY_NORMAL
+)
+
+
+def get_request_priority() -> int:
+    """Return the priority of the requests of the running task."""
+    return _REQUEST_PRIORITY.get()
+
+
+@contextmanager
+def request_priority(priority: int):
+    """Send the requests made within the block with the given priority."""
+    token = _REQUEST_PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _REQUEST_PRIORITY.reset(token)
+
+
+class PriorityLimiter:
+    """Semaphore handing its free slots to the waiter with the best priority.
+
+    Waiters of the same priority are served in order of arrival, so user
+    actions (PTZ, siren, snapshots) overtake queued polls and VoD searches
+    without starving requests of their own lane.
+    """
+
+    def __init__(self, limit: int):
+        """Initialize the limiter."""
+        self._limit = limit
+        self._active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    @property
+    def queued(self) -> int:
+        """Return the number of waiting requests."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int):
+        """Wait for a free slot."""
+        if self._active < self._limit and not self.queued:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation, pass it on
+                self.release()
+            raise
+
+    def release(self):
+        """Free a slot, or hand it over to the best waiter."""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._active -= 1
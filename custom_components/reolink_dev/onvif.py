@@ -0,0 +1,151 @@
+"""This component parses the ONVIF notifications sent by Reolink cameras."""
+from dataclasses import dataclass, field
+import logging
+import re
+from typing import Dict, List, Optional
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+_LOGGER = logging.getLogger(__name__)
+
+# Last part of the ONVIF topic (rule) mapped to the detected object
+TOPIC_OBJECTS = {
+    "Motion": "motion",
+    "MotionAlarm": "motion",
+    "PeopleDetect": "person",
+    "FaceDetect": "face",
+    "VehicleDetect": "vehicle",
+    "DogCatDetect": "pet",
+}
+
+# Names of the data items carrying the state of a topic
+STATE_ITEMS = ("IsMotion", "State")
+
+# Names of the source items identifying the video source (channel)
+SOURCE_ITEMS = ("VideoSourceConfigurationToken", "VideoSourceToken", "Source")
+
+
+@dataclass
+class OnvifEvent:
+    """A state change of one topic of an ONVIF notification."""
+
+    topic: str
+    object_type: Optional[str]
+    state: bool
+    source: Optional[str] = None
+    items: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def channel(self) -> Optional[int]:
+        """Return the channel number from the source token, if it has one."""
+        if self.source is None:
+            return None
+        match = re.search(r"(\d+)$", self.source)
+        return int(match.group(1)) if match else None
+
+
+def _local_name(tag: str) -> str:
+    """Strip the namespace of a tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _simple_items(element: Optional[Element]) -> Dict[str, str]:
+    """Return the SimpleItem name/value pairs below an element."""
+    items = {}
+    if element is None:
+        return items
+    for item in element.iter():
+        if _local_name(item.tag) == "SimpleItem" and "Name" in item.attrib:
+            items[item.attrib["Name"]] = item.attrib.get("Value", "")
+    return items
+
+
+class OnvifNotificationParser:
+    """Incremental parser of an ONVIF Notify payload.
+
+    The payload is fed in chunks as it is received, every NotificationMessage
+    is turned into an OnvifEvent when its end tag is read and then dropped.
+    """
+
+    def __init__(self):
+        """Initialize the parser."""
+        self._parser = XMLPullParser(events=("end",))
+        self._events: List[OnvifEvent] = []
+        self._failed = False
+
+    @property
+    def failed(self) -> bool:
+        """Return True if the payload is not valid XML."""
+        return self._failed
+
+    def feed(self, data: bytes):
+        """Parse the next chunk of the payload."""
+        if self._failed:
+            return
+        try:
+            self._parser.feed(data)
+        except ParseError as ex:
+            _LOGGER.debug("Invalid ONVIF notification: %s", ex)
+            self._failed = True
+            return
+        self._read_events()
+
+    def close(self) -> List[OnvifEvent]:
+        """Finish the payload and return its events."""
+        if not self._failed:
+            try:
+                self._parser.close()
+            except ParseError as ex:
+                _LOGGER.debug("Invalid ONVIF notification: %s", ex)
+                self._failed = True
+            else:
+                self._read_events()
+        return self._events
+
+    def _read_events(self):
+        """Convert the completed notification messages."""
+        for _, element in self._parser.read_events():
+            if _local_name(element.tag) != "NotificationMessage":
+                continue
+            event = self._parse_message(element)
+            if event is not None:
+                self._events.append(event)
+            element.clear()
+
+    @staticmethod
+    def _parse_message(message: Element) -> Optional[OnvifEvent]:
+        """Convert one NotificationMessage."""
+        topic = None
+        source = None
+        data = None
+        for element in message.iter():
+            name = _local_name(element.tag)
+            if name == "Topic" and element.text:
+                topic = element.text.strip()
+            elif name == "Source":
+                source = element
+            elif name == "Data":
+                data = element
+        if not topic:
+            return None
+
+        data_items = _simple_items(data)
+        state = next((data_items[name] for name in STATE_ITEMS if name in data_items), None)
+        if state is None:
+            return None
+
+        source_items = _simple_items(source)
+        rule = topic.rsplit("/", 1)[-1]
+        return OnvifEvent(
+            topic=topic,
+            object_type=TOPIC_OBJECTS.get(rule),
+            state=state.lower() == "true",
+            source=next((source_items[name] for name in SOURCE_ITEMS if name in source_items), None),
+            items={**source_items, **data_items},
+        )
+
+
+def parse_notification(payload: bytes) -> List[OnvifEvent]:
+    """Parse a complete ONVIF Notify payload."""
+    parser = OnvifNotificationParser()
+    parser.feed(payload)
+    return parser.close()
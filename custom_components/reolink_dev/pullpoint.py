@@ -0,0 +1,227 @@
+"""This component fetches the ONVIF events of Reolink cameras through a PullPoint subscription."""
+import asyncio
+from datetime import datetime
+import logging
+from typing import Callable, List, Optional
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from reolink.subscription_manager import TERMINATION_TIME, Manager
+
+from .const import (
+    PULL_POINT_ERROR_BACKOFF_MAX,
+    PULL_POINT_MESSAGE_LIMIT,
+    PULL_POINT_TIMEOUT,
+)
+from .onvif import OnvifEvent, OnvifNotificationParser
+
+_LOGGER = logging.getLogger(__name__)
+
+_SECURITY_XML = """
+            <wsse:Security soap:mustUnderstand="true" xmlns:wsse="http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-wssecurity-secext-1.0.xsd"
+                xmlns:wsu="http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-wssecurity-utility-1.0.xsd">
+                <wsse:UsernameToken wsu:Id="UsernameToken-{UsernameToken}">
+                    <wsse:Username>{Username}</wsse:Username>
+                    <wsse:Password Type="http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-username-token-profile-1.0#PasswordDigest">{PasswordDigest}</wsse:Password>
+                    <wsse:Nonce EncodingType="http://docs.oasis-open.org/wss/2004/01/oasis-200401-wss-soap-message-security-1.0#Base64Binary">{Nonce}</wsse:Nonce>
+                    <wsu:Created>{Created}</wsu:Created>
+                </wsse:UsernameToken>
+            </wsse:Security>"""
+
+CREATE_PULL_POINT_ACTION = "http://www.onvif.org/ver10/events/wsdl/EventPortType/CreatePullPointSubscriptionRequest"
+PULL_MESSAGES_ACTION = "http://www.onvif.org/ver10/events/wsdl/PullPointSubscription/PullMessagesRequest"
+
+CREATE_PULL_POINT_XML = """
+    <soap:Envelope xmlns:add="http://www.w3.org/2005/08/addressing" xmlns:tev="http://www.onvif.org/ver10/events/wsdl" xmlns:soap="http://www.w3.org/2003/05/soap-envelope">
+        <soap:Header>
+            <add:Action>{Action}</add:Action>""" + _SECURITY_XML + """
+        </soap:Header>
+        <soap:Body>
+            <tev:CreatePullPointSubscription>
+                <tev:InitialTerminationTime>{InitialTerminationTime}</tev:InitialTerminationTime>
+            </tev:CreatePullPointSubscription>
+        </soap:Body>
+    </soap:Envelope>
+"""
+
+PULL_MESSAGES_XML = """
+    <soap:Envelope xmlns:add="http://www.w3.org/2005/08/addressing" xmlns:tev="http://www.onvif.org/ver10/events/wsdl" xmlns:soap="http://www.w3.org/2003/05/soap-envelope">
+        <soap:Header>
+            <add:Action>{Action}</add:Action>
+            <add:To>{To}</add:To>""" + _SECURITY_XML + """
+        </soap:Header>
+        <soap:Body>
+            <tev:PullMessages>
+                <tev:Timeout>{Timeout}</tev:Timeout>
+                <tev:MessageLimit>{MessageLimit}</tev:MessageLimit>
+            </tev:PullMessages>
+        </soap:Body>
+    </soap:Envelope>
+"""
+
+
+class PullPointManager(Manager):
+    """ONVIF PullPoint subscription of a host.
+
+    Instead of having the camera call a webhook, one long-lived PullMessages
+    request per host waits for the events, so Home Assistant does not need to
+    be reachable from the camera. Renewing and unsubscribing work the same as
+    for the webhook subscription of the base class, the subscription is
+    renewed by the renewer of the push manager, not while pulling.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, host, port, username, password
+    ):  # pylint: disable=too-many-arguments
+        """Initialize the subscription."""
+        super().__init__(host, port, username, password)
+        self._hass = hass
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def subscribed(self) -> bool:
+        """Return True if the pull point exists."""
+        return self._manager_url is not None
+
+    @property
+    def running(self) -> bool:
+        """Return True while the events are pulled."""
+        return self._task is not None and not self._task.done()
+
+    def _headers(self, action: str) -> dict:
+        """Return the headers of a SOAP request."""
+        return {
+            "Content-Type": f'application/soap+xml;charset=UTF-8;action="{action}"'
+        }
+
+    async def subscribe(self, webhook_url=None):
+        """Create the PullPoint subscription, it has no webhook."""
+        parameters = {
+            "Action": CREATE_PULL_POINT_ACTION,
+            "InitialTerminationTime": f"PT{TERMINATION_TIME}M",
+        }
+        parameters.update(await self.get_digest())
+        local_time = datetime.utcnow()
+
+        response = await self.send(
+            self._headers(CREATE_PULL_POINT_ACTION), CREATE_PULL_POINT_XML.format(**parameters)
+        )
+        if response is None:
+            return False
+
+        self._manager_url = await self.extract_value(response, "Address")
+        remote_time = await self.convert_time(await self.extract_value(response, "CurrentTime"))
+        self._termination_time = await self.convert_time(
+            await self.extract_value(response, "TerminationTime")
+        )
+        if self._manager_url is None or remote_time is None or self._termination_time is None:
+            _LOGGER.error(
+                "Host: %s failed to create the pull point. Required response parameters not available.",
+                self._host,
+            )
+            return False
+
+        self._time_difference = await self.calc_time_difference(local_time, remote_time)
+        return True
+
+    async def pull_messages(self) -> List[OnvifEvent]:
+        """Wait for the next events, raise aiohttp errors when the request fails."""
+        parameters = {
+            "Action": PULL_MESSAGES_ACTION,
+            "To": self._manager_url,
+            "Timeout": f"PT{PULL_POINT_TIMEOUT}S",
+            "MessageLimit": PULL_POINT_MESSAGE_LIMIT,
+        }
+        parameters.update(await self.get_digest())
+
+        parser = OnvifNotificationParser()
+        session = async_get_clientsession(self._hass, verify_ssl=False)
+        async with session.post(
+            self._manager_url,
+            data=PULL_MESSAGES_XML.format(**parameters),
+            headers=self._headers(PULL_MESSAGES_ACTION),
+            timeout=aiohttp.ClientTimeout(
+                total=PULL_POINT_TIMEOUT + self._timeout.total
+            ),
+            allow_redirects=False,
+        ) as response:
+            if response.status != 200:
+                raise aiohttp.ClientResponseError(
+                    response.request_info,
+                    response.history,
+                    status=response.status,
+                    message=response.reason,
+                )
+            async for chunk in response.content.iter_any():
+                parser.feed(chunk)
+        return parser.close()
+
+    def start(
+        self,
+        handle_events: Callable[[List[OnvifEvent]], None],
+        set_available: Callable[[bool], None],
+    ):
+        """Pull the events in the background until stopped."""
+        if not self.running:
+            self._task = self._hass.async_create_task(
+                self._async_run(handle_events, set_available)
+            )
+
+    async def stop(self):
+        """Stop pulling the events and unsubscribe."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._manager_url is not None:
+            await self.unsubscribe()
+
+    async def _async_run(
+        self,
+        handle_events: Callable[[List[OnvifEvent]], None],
+        set_available: Callable[[bool], None],
+    ):
+        """Subscribe, then keep a PullMessages request waiting for the events."""
+        available = None
+        errors = 0
+        while True:
+            try:
+                if self._manager_url is None:
+                    if not await self.subscribe():
+                        raise aiohttp.ClientError("pull point subscription failed")
+                    _LOGGER.info("Host %s subscribed to its pull point", self._host)
+
+                events = await self.pull_messages()
+            except Exception as ex:  # pylint: disable=broad-except
+                errors += 1
+                delay = min(2 ** errors, PULL_POINT_ERROR_BACKOFF_MAX)
+                if isinstance(ex, (aiohttp.ClientError, asyncio.TimeoutError)):
+                    _LOGGER.debug("Host %s pull point error: %s, retrying in %i seconds", self._host, ex, delay)
+                else:
+                    _LOGGER.exception("Host %s pull point failed, retrying in %i seconds", self._host, delay)
+                if available is not False:
+                    available = False
+                    set_available(False)
+                # A failed renewal unsubscribed already, a failed pull is retried on a new subscription
+                if self.subscribed:
+                    try:
+                        await self.unsubscribe()
+                    except Exception:  # pylint: disable=broad-except
+                        _LOGGER.debug("Host %s failed to unsubscribe its pull point", self._host)
+                await asyncio.sleep(delay)
+                continue
+
+            errors = 0
+            if available is not True:
+                available = True
+                set_available(True)
+            if events:
+                try:
+                    handle_events(events)
+                except Exception:  # pylint: disable=broad-except
+                    _LOGGER.exception("Host %s failed to handle its pulled events", self._host)
@@ -0,0 +1,134 @@
+"""This component renews the ONVIF event subscriptions of all Reolink hosts."""
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN_DATA,
+    RENEW_ERROR_BACKOFF_MAX,
+    RENEW_MIN_DELAY,
+    RENEW_RETRY,
+    RENEW_SPACING,
+    RENEWER,
+    SESSION_RENEW_THRESHOLD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_renewer(hass: HomeAssistant) -> "SubscriptionRenewer":
+    """Return the subscription renewer of the integration, create it on first use."""
+    data: dict = hass.data.setdefault(DOMAIN_DATA, {})
+    renewer = data.get(RENEWER)
+    if renewer is None:
+        renewer = data[RENEWER] = SubscriptionRenewer(hass)
+    return renewer
+
+
+class _RenewJob:
+    """A subscription renewed by the renewer."""
+
+    def __init__(
+        self,
+        name: str,
+        lease: Callable[[], Optional[float]],
+        renew: Callable[[], Awaitable[bool]],
+    ):
+        self.name = name
+        self.lease = lease
+        self.renew = renew
+        self.errors = 0
+        self.due: Optional[float] = None
+        self.handle: Optional[asyncio.TimerHandle] = None
+
+
+class SubscriptionRenewer:
+    """Integration wide timers renewing the event subscriptions of all hosts.
+
+    Every subscription has its own timer, armed SESSION_RENEW_THRESHOLD
+    seconds before its lease expires, instead of being checked on every state
+    poll. The renewals of different hosts are kept RENEW_SPACING seconds
+    apart, and a failed renewal is retried with a backoff without holding
+    up the polls.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the renewer."""
+        self._hass = hass
+        self._jobs: Dict[str, _RenewJob] = {}
+
+    @callback
+    def async_add_job(
+        self,
+        name: str,
+        lease: Callable[[], Optional[float]],
+        renew: Callable[[], Awaitable[bool]],
+    ):
+        """Renew a subscription before its lease, in seconds or None if not subscribed, expires."""
+        self.async_remove_job(name)
+        job = self._jobs[name] = _RenewJob(name, lease, renew)
+        self._schedule(job, self._next_delay(job))
+
+    @callback
+    def async_remove_job(self, name: str):
+        """Stop renewing a subscription."""
+        job = self._jobs.pop(name, None)
+        if job is not None and job.handle is not None:
+            job.handle.cancel()
+
+    def _next_delay(self, job: _RenewJob) -> float:
+        """Return the delay until a subscription must be renewed."""
+        if job.errors:
+            return RENEW_RETRY * min(2 ** (job.errors - 1), RENEW_ERROR_BACKOFF_MAX)
+        lease = job.lease()
+        if lease is None:
+            # Not subscribed (yet), the renewal subscribes
+            return RENEW_RETRY
+        # An expired lease that was not renewed (the renewal subscribes again) is not retried at once
+        return max(lease - SESSION_RENEW_THRESHOLD, RENEW_MIN_DELAY)
+
+    def _schedule(self, job: _RenewJob, delay: float):
+        """Arm the timer of a job, away from the renewals of the other hosts."""
+        now = self._hass.loop.time()
+        others = sorted(other.due for other in self._jobs.values() if other is not job and other.due)
+        # Renewing early is safe, late is not: move up until clear of the others, unless that is past
+        due = now + delay
+        for other in reversed(others):
+            if abs(other - due) < RENEW_SPACING:
+                due = other - RENEW_SPACING
+        if due < now:
+            due = now + delay
+            for other in others:
+                if abs(other - due) < RENEW_SPACING:
+                    due = other + RENEW_SPACING
+        due += random.uniform(0, 1)
+        job.due = due
+        job.handle = self._hass.loop.call_at(
+            due, lambda: self._hass.async_create_task(self._async_run(job))
+        )
+
+    async def _async_run(self, job: _RenewJob):
+        """Renew a subscription if its lease is about to expire and arm the next renewal."""
+        job.handle = None
+        job.due = None
+        lease = job.lease()
+        # A lease this long was renewed by other means (a new subscription) since the timer was armed
+        if job.errors or lease is None or lease <= 2 * SESSION_RENEW_THRESHOLD:
+            try:
+                renewed = await job.renew()
+            except Exception:  # pylint: disable=broad-except
+                _LOGGER.exception("Renewal of %s failed", job.name)
+                renewed = False
+
+            if renewed:
+                job.errors = 0
+            else:
+                job.errors += 1
+                _LOGGER.debug("Renewal of %s failed %d time(s) in a row", job.name, job.errors)
+
+        if self._jobs.get(job.name) is job and job.handle is None:
+            self._schedule(job, self._next_delay(job))
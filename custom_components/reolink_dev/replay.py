@@ -0,0 +1,254 @@
+"""Replay captured camera notifications through the event pipeline and measure it.
+
+The notifications of a capture file (see the start_capture service) are
+handed to the same webhook and SMTP handlers as in Home Assistant, at their
+original pace, N times faster or as fast as possible. Every source of the
+capture gets a push manager with a simulated camera, and the latency is
+measured from the handler receiving a notification to its camera signalling
+the event its entities update their state from.
+
+    python -m custom_components.reolink_dev.replay CAPTURE [--speed N | --max] [--window S]
+"""
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import sys
+from types import SimpleNamespace
+from typing import Deque, Dict, List, Optional, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
+
+from .base import ReolinkPush, _webhooks, handle_webhook
+from .capture import KIND_SMTP, KIND_WEBHOOK, CaptureRecord, read_records
+from .const import DEFAULT_EVENT_WINDOW, DOMAIN, EVENT_DATA_RECEIVED, EVENT_HISTORY_SIZE
+from .history import EventHistory
+from .smtp import SmtpServer, _Handler, parse_alarm_mail
+from .typings import CameraEvent
+
+
+class _SimulatedApi:
+    """The API of a simulated camera."""
+
+    def __init__(self, email_sender: Optional[str] = None):
+        self.email_sender = email_sender
+        self.motion_state = False
+        self.ai_state = {}
+
+    def is_nvr(self) -> bool:
+        """Return False, a simulated camera is a single camera."""
+        return False
+
+
+class SimulatedCamera:
+    """A camera without a device, the member of a push manager during a replay."""
+
+    def __init__(self, hass: HomeAssistant, name: str, email_sender: Optional[str] = None):
+        self._hass = hass
+        self.name = name
+        self.channel = 1
+        self.api = _SimulatedApi(email_sender)
+        self.history = EventHistory(EVENT_HISTORY_SIZE)
+        self.pending: Deque[float] = deque()
+        self.latencies: List[float] = []
+        self.events = 0
+
+    @property
+    def event_signal(self):
+        """Return the signal of the events of the camera."""
+        return f"{DOMAIN}_replay_{self.name}_event"
+
+    def handles_event(self, event: CameraEvent) -> bool:
+        """Return True if an event concerns the camera."""
+        return event.channels is None or self.channel - 1 in event.channels
+
+    @callback
+    def async_send_event(self, event: CameraEvent):
+        """Signal an event to the (measured) entities of the camera."""
+        async_dispatcher_send(self._hass, self.event_signal, event)
+
+    @callback
+    def async_add_snapshot(self, image: bytes, received=None):  # pylint: disable=unused-argument
+        """Ignore the images of the alarm e-mails."""
+
+
+class _Content:
+    """The body of a replayed webhook request."""
+
+    def __init__(self, payload: bytes):
+        self._payload = payload
+
+    async def iter_any(self):
+        """Return the payload in one chunk."""
+        yield self._payload
+
+
+class Replay:
+    """The push managers and simulated cameras of the sources of a capture."""
+
+    def __init__(self, hass: HomeAssistant, records: List[CaptureRecord], window: float):
+        self._hass = hass
+        self._window = window
+        self._smtp = SmtpServer(hass)
+        self._smtp_executor = ThreadPoolExecutor(1, "reolink_dev_replay_smtp")
+        self.pushes: List[ReolinkPush] = []
+        self.cameras: Dict[Tuple, SimulatedCamera] = {}
+        for record in records:
+            self._camera(record)
+
+    def _camera(self, record: CaptureRecord) -> SimulatedCamera:
+        """Return the simulated camera of the source of a record, create it on first use."""
+        if record.kind == KIND_WEBHOOK:
+            key = (KIND_WEBHOOK, record.meta["webhook_id"])
+        else:
+            key = (KIND_SMTP, record.meta["port"], record.meta["peer"], record.meta["sender"])
+        camera = self.cameras.get(key)
+        if camera is not None:
+            return camera
+
+        index = len(self.cameras)
+        push = ReolinkPush(self._hass, f"replay-{index}", 0, "", "")
+        push._event_id = f"{EVENT_DATA_RECEIVED}-replay-{index}"  # pylint: disable=protected-access
+        push.coalescer.window = self._window
+        if record.kind == KIND_WEBHOOK:
+            camera = SimulatedCamera(self._hass, f"webhook_{index}")
+            _webhooks(self._hass)[record.meta["webhook_id"]] = push
+        else:
+            name = parse_alarm_mail(record.payload).camera_name or f"smtp_{index}"
+            camera = SimulatedCamera(self._hass, name, record.meta["sender"])
+            push._smtp_addresses = {record.meta["peer"]}  # pylint: disable=protected-access
+            self._smtp._targets.setdefault(record.meta["port"], []).append(push)  # pylint: disable=protected-access
+        push.add_member(camera)
+        self.pushes.append(push)
+        self.cameras[key] = camera
+
+        @callback
+        def async_event_signalled(event: CameraEvent):
+            """Measure the latency of the notifications leading to an event."""
+            if event.motion is None:
+                return
+            now = self._hass.loop.time()
+            # Notifications merged into the event arrived within the window, older ones were dropped
+            merged = [arrived for arrived in camera.pending if now - arrived <= self._window + 0.05]
+            if merged:
+                camera.latencies.append(now - min(merged))
+            camera.pending.clear()
+            camera.events += 1
+
+        async_dispatcher_connect(self._hass, camera.event_signal, async_event_signalled)
+        return camera
+
+    async def async_feed(self, record: CaptureRecord):
+        """Hand a notification to its handler."""
+        camera = self._camera(record)
+        camera.pending.append(self._hass.loop.time())
+        if record.kind == KIND_WEBHOOK:
+            request = SimpleNamespace(body_exists=True, content=_Content(record.payload))
+            await handle_webhook(self._hass, record.meta["webhook_id"], request)
+            return
+
+        # Parsed in a thread of its own, like the SMTP server does
+        session = SimpleNamespace(peer=(record.meta["peer"], 0))
+        envelope = SimpleNamespace(content=record.payload, mail_from=record.meta["sender"])
+        handler = _Handler(self._smtp, record.meta["port"])
+        await self._hass.loop.run_in_executor(
+            self._smtp_executor, asyncio.run, handler.handle_DATA(None, session, envelope)
+        )
+
+    def close(self):
+        """Stop the coalescers and the SMTP parser thread."""
+        for push in self.pushes:
+            push.coalescer.async_stop()
+        self._smtp_executor.shutdown()
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """Return a percentile of a non-empty list."""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def async_replay(path: str, speed: Optional[float], window: float) -> dict:
+    """Replay a capture, speed None replays as fast as possible, return the measurements."""
+    records = list(read_records(path))
+    hass = HomeAssistant()
+    replay = Replay(hass, records, window)
+    loop = hass.loop
+
+    started = loop.time()
+    first = records[0].timestamp if records else 0
+    for record in records:
+        if speed:
+            delay = started + (record.timestamp - first) / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await replay.async_feed(record)
+        await asyncio.sleep(0)
+    fed = loop.time() - started
+
+    # Let the last windows close
+    await asyncio.sleep(window + 0.1)
+    await hass.async_block_till_done()
+
+    latencies = [latency for camera in replay.cameras.values() for latency in camera.latencies]
+    counters = {"received": 0, "fired": 0, "dropped": 0}
+    for push in replay.pushes:
+        for key, value in push.coalescer.counters.items():
+            counters[key] += value
+    replay.close()
+    await hass.async_stop(force=True)
+
+    return {
+        "notifications": len(records),
+        "sources": len(replay.cameras),
+        "duration": fed,
+        "throughput": len(records) / fed if fed > 0 else 0,
+        "events": sum(camera.events for camera in replay.cameras.values()),
+        "latency_ms": {
+            "p50": statistics.median(latencies) * 1000,
+            "p95": _percentile(latencies, 95) * 1000,
+            "max": max(latencies) * 1000,
+        }
+        if latencies
+        else None,
+        **counters,
+    }
+
+
+def main(argv=None) -> int:
+    """Replay a capture file and print the measurements."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("capture", help="capture file written by the start_capture service")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--speed", type=float, default=1.0, help="replay N times faster (default 1)")
+    group.add_argument("--max", action="store_true", help="replay as fast as possible")
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=DEFAULT_EVENT_WINDOW,
+        help=f"event merge window in seconds (default {DEFAULT_EVENT_WINDOW})",
+    )
+    args = parser.parse_args(argv)
+
+    result = asyncio.run(async_replay(args.capture, None if args.max else args.speed, args.window))
+    print(
+        f"{result['notifications']} notifications from {result['sources']} source(s)"
+        f" in {result['duration']:.3f} s: {result['throughput']:.1f} notifications/s"
+    )
+    print(
+        f"{result['events']} events signalled (coalescer received {result['received']},"
+        f" fired {result['fired']}, dropped {result['dropped']})"
+    )
+    latency = result["latency_ms"]
+    if latency:
+        print(
+            f"latency notification to event: p50 {latency['p50']:.2f} ms,"
+            f" p95 {latency['p95']:.2f} ms, max {latency['max']:.2f} ms"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""This component schedules the polls of all Reolink cameras."""
+import asyncio
+from datetime import timedelta
+import logging
+import random
+from typing import Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    DOMAIN_DATA,
+    POLL_ERROR_BACKOFF_MAX,
+    POLL_IDLE_AFTER,
+    POLL_IDLE_FACTOR,
+    POLL_JITTER,
+    POLL_MAX_CONCURRENT,
+    SCHEDULER,
+)
+from .limiter import PRIORITY_BACKGROUND, request_priority
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> "ReolinkScheduler":
+    """Return the scheduler of the integration, create it on first use."""
+    data: dict = hass.data.setdefault(DOMAIN_DATA, {})
+    scheduler = data.get(SCHEDULER)
+    if scheduler is None:
+        scheduler = data[SCHEDULER] = ReolinkScheduler(hass)
+    return scheduler
+
+
+class _PollJob:
+    """A coordinator refreshed by the scheduler."""
+
+    def __init__(
+        self, name: str, group: str, coordinator: DataUpdateCoordinator, interval: timedelta
+    ):
+        self.name = name
+        self.group = group
+        self.coordinator = coordinator
+        self.interval = interval.total_seconds()
+        self.errors = 0
+        self.handle: Optional[asyncio.TimerHandle] = None
+        self.running = False
+
+
+class ReolinkScheduler:
+    """Integration wide scheduler refreshing the coordinators of all cameras.
+
+    Instead of every coordinator running its own fixed timer, which makes a
+    fleet of cameras poll in lockstep after a restart, the polls are spread
+    over their interval with a random offset and jitter, and only
+    POLL_MAX_CONCURRENT of them run at the same time. The interval of a poll
+    stretches with consecutive errors and when its camera has been idle for
+    a while, and returns to normal on success or activity.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the scheduler."""
+        self._hass = hass
+        self._jobs: Dict[str, _PollJob] = {}
+        self._activity: Dict[str, float] = {}
+        self._semaphore = asyncio.Semaphore(POLL_MAX_CONCURRENT)
+
+    @callback
+    def async_add_job(
+        self,
+        name: str,
+        group: str,
+        coordinator: DataUpdateCoordinator,
+        interval: Optional[timedelta],
+    ):
+        """Refresh the coordinator every interval, the first run at a random offset."""
+        self.async_remove_job(name)
+        job = self._jobs[name] = _PollJob(name, group, coordinator, interval or timedelta(0))
+        self._activity.setdefault(group, self._hass.loop.time())
+        if job.interval > 0:
+            self._schedule(job, random.uniform(0, job.interval))
+
+    @callback
+    def async_remove_job(self, name: str):
+        """Stop refreshing a coordinator."""
+        job = self._jobs.pop(name, None)
+        if job is None:
+            return
+        if job.handle is not None:
+            job.handle.cancel()
+        if not any(other.group == job.group for other in self._jobs.values()):
+            self._activity.pop(job.group, None)
+
+    @callback
+    def async_set_interval(self, name: str, interval: Optional[timedelta]):
+        """Change the interval of a job, None or 0 disables it."""
+        job = self._jobs.get(name)
+        if job is None:
+            return
+        job.interval = interval.total_seconds() if interval else 0
+        self.async_reschedule(name)
+
+    @callback
+    def async_reschedule(self, name: str):
+        """Restart the interval of a job, its data was refreshed by other means."""
+        job = self._jobs.get(name)
+        if job is None or job.running:
+            return
+        if job.handle is not None:
+            job.handle.cancel()
+            job.handle = None
+        if job.interval > 0:
+            self._schedule(job, self._next_delay(job))
+
+    @callback
+    def async_mark_active(self, group: str):
+        """Register activity on a camera, its polls return to their normal interval."""
+        self._activity[group] = self._hass.loop.time()
+
+    def _next_delay(self, job: _PollJob) -> float:
+        """Return the jittered delay of the next run of a job."""
+        delay = job.interval
+        if job.errors:
+            delay *= min(2 ** job.errors, POLL_ERROR_BACKOFF_MAX)
+        elif self._hass.loop.time() - self._activity.get(job.group, 0) > POLL_IDLE_AFTER:
+            delay *= POLL_IDLE_FACTOR
+        return delay * random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+
+    def _schedule(self, job: _PollJob, delay: float):
+        """Arm the timer of a job."""
+        job.handle = self._hass.loop.call_later(
+            delay, lambda: self._hass.async_create_task(self._async_run(job))
+        )
+
+    async def _async_run(self, job: _PollJob):
+        """Refresh the coordinator of a job and schedule its next run."""
+        job.handle = None
+        job.running = True
+        try:
+            async with self._semaphore:
+                with request_priority(PRIORITY_BACKGROUND):
+                    await job.coordinator.async_refresh()
+        finally:
+            job.running = False
+
+        if job.coordinator.last_update_success:
+            job.errors = 0
+        else:
+            job.errors += 1
+            _LOGGER.debug("Poll %s failed %d time(s) in a row", job.name, job.errors)
+
+        if self._jobs.get(job.name) is job and job.interval > 0 and job.handle is None:
+            self._schedule(job, self._next_delay(job))
@@ -7,9 +7,10 @@ import logging
 import os
 
 from dateutil import relativedelta
-from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.core import HomeAssistant
 import homeassistant.util.dt as dt_utils
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
 from homeassistant.components.sensor import DEVICE_CLASS_TIMESTAMP, SensorEntity
 
@@ -23,8 +24,9 @@ from .const import (
     VOD_URL,
 )
 from .entity import ReolinkEntity
+from .limiter import PRIORITY_BACKGROUND, request_priority
 from .base import ReolinkBase, searchtime_to_datetime
-from .typings import VoDEvent, VoDEventThumbnail
+from .typings import CameraEvent, VoDEvent, VoDEventThumbnail
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -34,7 +36,6 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
     base: ReolinkBase = hass.data[DOMAIN][config_entry.entry_id][BASE]
 
     # TODO : add playback (based off of hdd_info) to api capabilities
-    await base.api.get_switch_capabilities()
     if base.api.hdd_info:
         devices.append(LastEventSensor(hass, config_entry))
 
@@ -56,24 +57,16 @@ class LastEventSensor(ReolinkEntity, SensorEntity):
         ReolinkEntity.__init__(self, hass, config)
         SensorEntity.__init__(self)
         self._attrs = _Attrs()
-        self._bus_listener: CALLBACK_TYPE = None
         self._entry_id = config.entry_id
 
     async def async_added_to_hass(self) -> None:
         """Entity created."""
         await super().async_added_to_hass()
-        self._bus_listener = self.hass.bus.async_listen(
-            self._base.event_id, self.handle_event
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, self._base.event_signal, self.handle_event)
         )
         self._hass.async_add_job(self._update_event_range)
 
-    async def async_will_remove_from_hass(self):
-        """Entity removed"""
-        if self._bus_listener:
-            self._bus_listener()
-            self._bus_listener = None
-        await super().async_will_remove_from_hass()
-
     async def request_refresh(self):
         """ force an update of the sensor """
         await super().request_refresh()
@@ -85,6 +78,8 @@ class LastEventSensor(ReolinkEntity, SensorEntity):
         self._hass.async_add_job(self._update_event_range)
 
     async def _update_event_range(self):
+        if not self._base.available:
+            return
         end = dt_utils.now()
         start = self._attrs.most_recent_day
         if not start:
@@ -93,7 +88,8 @@ class LastEventSensor(ReolinkEntity, SensorEntity):
                 start -= relativedelta.relativedelta(
                     months=int(self._base.playback_months)
                 )
-        search, _ = await self._base.send_search(start, end, True)
+        with request_priority(PRIORITY_BACKGROUND):
+            search, _ = await self._base.send_search(start, end, True)
         if not search or len(search) < 1:
             return
         entry = search[0]
@@ -118,7 +114,8 @@ class LastEventSensor(ReolinkEntity, SensorEntity):
             tzinfo=end.tzinfo,
         )
         end = dt.datetime.combine(start.date(), dt.time.max, tzinfo=end.tzinfo)
-        _, files = await self._base.send_search(start, end)
+        with request_priority(PRIORITY_BACKGROUND):
+            _, files = await self._base.send_search(start, end)
         file = files[-1] if files and len(files) > 0 else None
         if file is None:
             return
@@ -145,17 +142,21 @@ class LastEventSensor(ReolinkEntity, SensorEntity):
             ),
         )
         thumbnail.exists = os.path.isfile(thumbnail.path)
+        if not thumbnail.exists:
+            thumbnail.exists = await self._base.async_save_thumbnail(
+                start, end, thumbnail.path
+            )
         data: dict = self._hass.data.setdefault(DOMAIN_DATA, {})
         data = data.setdefault(self._base.unique_id, {})
         data[LAST_EVENT] = last
         self._state = True
 
-        self.async_schedule_update_ha_state()
+        self.async_write_ha_state()
 
-    async def handle_event(self, event):
+    async def handle_event(self, event: CameraEvent):
         """Handle incoming event for VoD update"""
 
-        if "motion" not in event.data:
+        if event.motion is None or event.for_objects or not self._base.handles_event(event):
             return
 
         await self._hass.async_add_job(self._update_event_range)
@@ -196,6 +197,18 @@ class LastEventSensor(ReolinkEntity, SensorEntity):
         """Icon of the sensor."""
         return "mdi:history"
 
+    @property
+    def fingerprint(self):
+        """Return the values shown by the sensor."""
+        last = self._attrs.last_event
+        return (
+            self._state,
+            self._attrs.oldest_day,
+            last.event_id if last else None,
+            last.duration if last else None,
+            last.thumbnail.exists if last and last.thumbnail else None,
+        )
+
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
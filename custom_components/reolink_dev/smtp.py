@@ -0,0 +1,346 @@
+"""This component parses the alarm e-mails sent by Reolink cameras."""
+from abc import ABC, abstractmethod
+import asyncio
+import base64
+import binascii
+from dataclasses import dataclass
+from email.message import Message
+from email.parser import BytesHeaderParser
+import logging
+import quopri
+import re
+import socket
+import threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from aiosmtpd.smtp import SMTP
+from homeassistant.core import HomeAssistant, callback
+
+from .capture import KIND_SMTP, get_capture
+from .const import DOMAIN_DATA, SMTP_SERVER
+
+_LOGGER = logging.getLogger(__name__)
+
+# Alarm events of the e-mails mapped to the detected object, None for plain motion
+SMTP_EVENTS = {
+    "Motion Detection": None,
+    "Person Detected": "person",
+    "Vehicle Detected": "vehicle",
+    "Pet Detected": "pet",
+    "Dog or cat Detected": "pet",
+}
+
+_NAME = re.compile(r"Alarm Camera Name:\s*(.+?)\s*[\r\n]+")
+_EVENT = re.compile(r"Alarm Event:\s*(.+?)\s*[\r\n]+")
+_TEST = "tested the e-mail alert"
+
+_HEADER_PARSER = BytesHeaderParser()
+
+
+@dataclass
+class AlarmMail:
+    """The parts of an alarm e-mail the integration uses."""
+
+    test: bool = False
+    camera_name: Optional[str] = None
+    event: Optional[str] = None
+    snapshot: Optional[bytes] = None
+
+    @property
+    def handled(self) -> bool:
+        """Return True if the e-mail is a test or a known alarm event."""
+        return self.test or self.event in SMTP_EVENTS
+
+
+def _headers_end(content: bytes, start: int, end: int) -> int:
+    """Return the offset of the body following the headers starting at start."""
+    body = end
+    for separator in (b"\r\n\r\n", b"\n\n"):
+        offset = content.find(separator, start, end)
+        if offset != -1:
+            body = min(body, offset + len(separator))
+    return body
+
+
+def _decode_body(headers: Message, body: bytes) -> Optional[bytes]:
+    """Undo the transfer encoding of a part."""
+    encoding = headers.get("Content-Transfer-Encoding", "7bit").strip().lower()
+    try:
+        if encoding == "base64":
+            return base64.b64decode(body)
+        if encoding == "quoted-printable":
+            return quopri.decodestring(body)
+    except (binascii.Error, ValueError):
+        return None
+    return body
+
+
+def iter_parts(
+    content: bytes, start: int = 0, end: Optional[int] = None
+) -> Iterator[Tuple[Message, int, int]]:
+    """Yield the headers and body offsets of the leaf parts of a MIME message.
+
+    Only the headers are parsed, the bodies are skipped with a search for the
+    next boundary and decoded by the caller when it needs them.
+    """
+    end = len(content) if end is None else end
+    body_start = _headers_end(content, start, end)
+    headers = _HEADER_PARSER.parsebytes(content[start:body_start])
+
+    if headers.get_content_maintype() != "multipart":
+        yield headers, body_start, end
+        return
+
+    boundary = headers.get_param("boundary")
+    if not boundary:
+        return
+    delimiter = b"--" + boundary.encode()
+
+    position = content.find(delimiter, body_start, end)
+    while position != -1:
+        position += len(delimiter)
+        if content.startswith(b"--", position):
+            return  # Closing delimiter
+        part_start = content.find(b"\n", position, end)
+        if part_start == -1:
+            return
+        part_start += 1
+        position = content.find(delimiter, part_start, end)
+        part_end = end if position == -1 else position
+        yield from iter_parts(content, part_start, part_end)
+
+
+def parse_alarm_mail(content: bytes, snapshot: bool = False) -> AlarmMail:
+    """Find the camera name and alarm event of an e-mail, and optionally its snapshot.
+
+    Only the text parts and the first image are decoded, the walk stops as
+    soon as everything asked for is found.
+    """
+    mail = AlarmMail()
+    for headers, start, end in iter_parts(content):
+        maintype = headers.get_content_maintype()
+        if maintype == "text" and mail.event is None:
+            body = _decode_body(headers, content[start:end])
+            if body is None:
+                continue
+            text = body.decode(headers.get_content_charset() or "ascii", errors="replace")
+            if _TEST in text:
+                mail.test = True
+            name = _NAME.search(text)
+            event = _EVENT.search(text)
+            if name and event:
+                mail.camera_name = name.group(1)
+                mail.event = event.group(1)
+        elif maintype == "image" and snapshot and mail.snapshot is None:
+            mail.snapshot = _decode_body(headers, content[start:end])
+
+        if mail.event is not None and (not snapshot or mail.snapshot is not None):
+            break
+    return mail
+
+
+class SmtpTarget(ABC):
+    """A receiver of alarm e-mails, implemented by the push managers."""
+
+    @property
+    @abstractmethod
+    def smtp_addresses(self) -> Set[str]:
+        """Return the IP addresses the e-mails are sent from."""
+
+    @property
+    @abstractmethod
+    def smtp_senders(self) -> Set[str]:
+        """Return the sender addresses configured on the cameras."""
+
+    @abstractmethod
+    def has_camera(self, name: str) -> bool:
+        """Return True if the camera (channel) named in an e-mail is one of the target's."""
+
+    @callback
+    @abstractmethod
+    def async_handle_mail(self, mail: AlarmMail):
+        """Handle a parsed alarm e-mail in the event loop of Home Assistant."""
+
+
+@callback
+def async_get_smtp_server(hass: HomeAssistant) -> "SmtpServer":
+    """Return the SMTP server of the integration, create it on first use."""
+    data: dict = hass.data.setdefault(DOMAIN_DATA, {})
+    server = data.get(SMTP_SERVER)
+    if server is None:
+        server = data[SMTP_SERVER] = SmtpServer(hass)
+    return server
+
+
+class _Handler:
+    """The aiosmtpd handler of one listening port."""
+
+    def __init__(self, server: "SmtpServer", port: int):
+        """Initialize the handler."""
+        self._server = server
+        self._port = port
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):  # pylint: disable=invalid-name
+        """Reject EHLO."""
+        _LOGGER.debug("SMTP EHLO")
+        # Force error in EHLO querry so client falls back to HELO: end the reply with an
+        # empty line instead of the final "250 HELP"
+        return responses[:-1] + [""]
+
+    async def handle_DATA(self, server, session, envelope):  # pylint: disable=invalid-name
+        """Parse an e-mail in the SMTP thread and route it in the event loop."""
+        capture = get_capture(self._server.hass)
+        if capture is not None:
+            capture.write(
+                KIND_SMTP,
+                {
+                    "port": self._port,
+                    "peer": session.peer[0] if session.peer else None,
+                    "sender": envelope.mail_from,
+                },
+                envelope.content,
+            )
+
+        mail = parse_alarm_mail(envelope.content, snapshot=True)
+        _LOGGER.debug(
+            "SMTP data from %s (%s), camera: %s, event: %s",
+            envelope.mail_from,
+            session.peer[0] if session.peer else None,
+            mail.camera_name,
+            mail.event,
+        )
+
+        if not mail.handled:
+            _LOGGER.warning("SMTP received unhandled message (%d bytes)", len(envelope.content))
+            return "541 ERROR"
+
+        self._server.hass.loop.call_soon_threadsafe(
+            self._server.async_route,
+            self._port,
+            session.peer[0] if session.peer else None,
+            envelope.mail_from,
+            mail,
+        )
+        return "250 OK"
+
+
+class SmtpServer:
+    """The SMTP server receiving the alarm e-mails of all cameras.
+
+    A single thread runs the event loop serving every configured port, the
+    e-mails are parsed there and routed to the push manager of the camera
+    sending them in the event loop of Home Assistant: by the sender address,
+    the camera name in the e-mail, or the address the e-mail comes from.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the server."""
+        self.hass = hass
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._hostname: Optional[str] = None
+        self._servers: Dict[int, asyncio.AbstractServer] = {}
+        self._targets: Dict[int, List[SmtpTarget]] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def ports(self) -> List[int]:
+        """Return the ports listened on."""
+        return list(self._servers)
+
+    async def async_add_target(self, port: int, target: SmtpTarget):
+        """Route the e-mails received on a port to a target, listen on it if needed."""
+        async with self._lock:
+            targets = self._targets.setdefault(port, [])
+            if target not in targets:
+                targets.append(target)
+            if port in self._servers:
+                return
+
+            if self._loop is None:
+                await self._async_start()
+            _LOGGER.info("Starting SMTP server on port %i", port)
+            try:
+                self._servers[port] = await self._run(
+                    self._loop.create_server(
+                        lambda: SMTP(
+                            _Handler(self, port), hostname=self._hostname, loop=self._loop
+                        ),
+                        port=port,
+                    )
+                )
+            except OSError as ex:
+                _LOGGER.error("Could not start the SMTP server on port %i: %s", port, ex)
+                targets.remove(target)
+                if not targets:
+                    del self._targets[port]
+                await self._async_stop_if_unused()
+
+    async def async_remove_target(self, port: int, target: SmtpTarget):
+        """Stop routing the e-mails of a port to a target, stop listening if unused."""
+        async with self._lock:
+            targets = self._targets.get(port, [])
+            if target in targets:
+                targets.remove(target)
+            if targets:
+                return
+            self._targets.pop(port, None)
+
+            server = self._servers.pop(port, None)
+            if server is not None:
+                _LOGGER.info("Stopping SMTP server on port %i", port)
+                server.close()
+                await self._run(server.wait_closed())
+            await self._async_stop_if_unused()
+
+    @callback
+    def async_route(self, port: int, peer: Optional[str], sender: Optional[str], mail: AlarmMail):
+        """Hand an e-mail to the target sending it."""
+        targets = self._targets.get(port, [])
+        if len(targets) == 1:
+            target = targets[0]
+        else:
+            target = None
+            for matches in (
+                lambda target: bool(sender) and sender.lower() in target.smtp_senders,
+                lambda target: bool(mail.camera_name) and target.has_camera(mail.camera_name),
+                lambda target: bool(peer) and peer in target.smtp_addresses,
+            ):
+                found = [target for target in targets if matches(target)]
+                if len(found) == 1:
+                    target = found[0]
+                    break
+
+        if target is None:
+            _LOGGER.warning(
+                "SMTP could not route the e-mail of %s (%s, camera %s) to a camera",
+                sender,
+                peer,
+                mail.camera_name,
+            )
+            return
+        target.async_handle_mail(mail)
+
+    async def _async_start(self):
+        """Start the thread of the SMTP event loop."""
+        if self._hostname is None:
+            self._hostname = await self.hass.async_add_executor_job(socket.getfqdn)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="reolink_dev_smtp", daemon=True
+        )
+        self._thread.start()
+
+    async def _async_stop_if_unused(self):
+        """Stop the thread of the SMTP event loop when no port is listened on."""
+        if self._servers or self._loop is None:
+            return
+        loop, thread = self._loop, self._thread
+        self._loop = self._thread = None
+        loop.call_soon_threadsafe(loop.stop)
+        await self.hass.async_add_executor_job(thread.join)
+        loop.close()
+
+    async def _run(self, coro):
+        """Run a coroutine in the SMTP event loop."""
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
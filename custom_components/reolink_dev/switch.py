@@ -1,13 +1,16 @@
 """This component provides support many for Reolink IP cameras switches."""
+from abc import abstractmethod
 import asyncio
 import logging
+from typing import Optional
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.components.switch import DEVICE_CLASS_SWITCH
 from homeassistant.helpers.entity import ToggleEntity, EntityCategory
 
-from .const import BASE, DOMAIN
+from .const import BASE, DOMAIN, SWITCH_WRITE_DELAY
 from .entity import ReolinkEntity
+from .limiter import PRIORITY_INTERACTIVE, request_priority
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -17,7 +20,7 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
     devices = []
     base = hass.data[DOMAIN][config_entry.entry_id][BASE]
 
-    for capability in await base.api.get_switch_capabilities():
+    for capability in base.capabilities:
         if capability == "ftp":
             devices.append(FTPSwitch(hass, config_entry))
         elif capability == "email":
@@ -40,13 +43,110 @@ async def async_setup_entry(hass: HomeAssistant, config_entry, async_add_devices
     async_add_devices(devices, update_before_add=False)
 
 
-class FTPSwitch(ReolinkEntity, ToggleEntity):
-    """An implementation of a Reolink IP camera FTP switch."""
+class ReolinkSwitch(ReolinkEntity, ToggleEntity):
+    """Base class of the Reolink IP camera switches.
+
+    A toggle is shown at once and written to the camera after
+    SWITCH_WRITE_DELAY, so repeated toggles only write the last state. The
+    library reads the changed setting back after a write, no refresh of all
+    the states of the camera is needed.
+
+    A write is skipped when the camera already has the requested state, for
+    the switches whose state is read back from the camera only.
+    """
+
+    # False when api_state is the last state written, not the state of the camera
+    _state_read_back = True
 
     def __init__(self, hass, config):
-        """Initialize a Reolink camera."""
+        """Initialize a Reolink switch."""
         ReolinkEntity.__init__(self, hass, config)
         ToggleEntity.__init__(self)
+        self._optimistic_state: Optional[bool] = None
+        self._write_handle: Optional[asyncio.TimerHandle] = None
+        self._write_lock = asyncio.Lock()
+
+    @property
+    @abstractmethod
+    def api_state(self):
+        """Return the state known by the camera."""
+
+    @property
+    def is_on(self):
+        """Return the requested state while it is being written."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state
+        return self.api_state
+
+    @property
+    def device_class(self):
+        """Device class of the switch."""
+        return DEVICE_CLASS_SWITCH
+
+    @property
+    def fingerprint(self):
+        """Return the values shown by the switch."""
+        return self.is_on
+
+    @abstractmethod
+    async def async_write_state(self, state: bool) -> bool:
+        """Write the state to the camera."""
+
+    async def async_turn_on(self, **kwargs):
+        """Turn the switch on."""
+        self._async_request_state(True)
+
+    async def async_turn_off(self, **kwargs):
+        """Turn the switch off."""
+        self._async_request_state(False)
+
+    async def async_will_remove_from_hass(self):
+        """Drop a pending write."""
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+            self._write_handle = None
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def _async_request_state(self, state: bool):
+        """Show the requested state and (re)start the write delay."""
+        self._optimistic_state = state
+        self.async_write_ha_state()
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+        self._write_handle = self._hass.loop.call_later(
+            SWITCH_WRITE_DELAY, lambda: self._hass.async_create_task(self._async_write())
+        )
+
+    async def _async_write(self):
+        """Write the last requested state, unless the camera already has it."""
+        self._write_handle = None
+        async with self._write_lock:
+            state = self._optimistic_state
+            if state is None:
+                return
+
+            if not self._state_read_back or state != self.api_state:
+                action = "on" if state else "off"
+                try:
+                    with request_priority(PRIORITY_INTERACTIVE):
+                        if not await self.async_write_state(state):
+                            _LOGGER.error("Failed to turn %s %s", action, self.name)
+                except Exception as ex:  # pylint: disable=broad-except
+                    _LOGGER.error("Failed to turn %s %s: %s", action, self.name, ex)
+
+            # Keep a state requested while writing, it has its own write pending
+            if self._optimistic_state == state and self._write_handle is None:
+                self._optimistic_state = None
+            self.async_write_ha_state()
+
+
+class FTPSwitch(ReolinkSwitch):
+    """An implementation of a Reolink IP camera FTP switch."""
+
+    def __init__(self, hass, config):
+        """Initialize a Reolink camera."""
+        ReolinkSwitch.__init__(self, hass, config)
 
     @property
     def unique_id(self):
@@ -59,15 +159,10 @@ class FTPSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} FTP"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera Motion FTP upload Status."""
         return self._base.api.ftp_state
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -76,24 +171,17 @@ class FTPSwitch(ReolinkEntity, ToggleEntity):
 
         return "mdi:folder-remove"
 
-    async def async_turn_on(self, **kwargs):
-        """Enable motion ftp recording."""
-        await self._base.api.set_ftp(True)
-        await self.request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Disable motion ftp recording."""
-        await self._base.api.set_ftp(False)
-        await self.request_refresh()
+    async def async_write_state(self, state):
+        """Enable or disable motion ftp recording."""
+        return await self._base.api.set_ftp(state)
 
 
-class EmailSwitch(ReolinkEntity, ToggleEntity):
+class EmailSwitch(ReolinkSwitch):
     """An implementation of a Reolink IP camera email switch."""
 
     def __init__(self, hass, config):
         """Initialize a Reolink camera."""
-        ReolinkEntity.__init__(self, hass, config)
-        ToggleEntity.__init__(self)
+        ReolinkSwitch.__init__(self, hass, config)
 
     @property
     def unique_id(self):
@@ -106,15 +194,10 @@ class EmailSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} email"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera Motion email upload Status."""
         return self._base.api.email_state
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -123,24 +206,17 @@ class EmailSwitch(ReolinkEntity, ToggleEntity):
 
         return "mdi:email-outline"
 
-    async def async_turn_on(self, **kwargs):
-        """Enable motion email notification."""
-        await self._base.api.set_email(True)
-        await self.request_refresh()
+    async def async_write_state(self, state):
+        """Enable or disable motion email notification."""
+        return await self._base.api.set_email(state)
 
-    async def async_turn_off(self, **kwargs):
-        """Disable motion email notification."""
-        await self._base.api.set_email(False)
-        await self.request_refresh()
 
-
-class IRLightsSwitch(ReolinkEntity, ToggleEntity):
+class IRLightsSwitch(ReolinkSwitch):
     """An implementation of a Reolink IP camera ir lights switch."""
 
     def __init__(self, hass, config):
         """Initialize a Reolink camera."""
-        ReolinkEntity.__init__(self, hass, config)
-        ToggleEntity.__init__(self)
+        ReolinkSwitch.__init__(self, hass, config)
         self._attr_entity_category = EntityCategory.CONFIG
 
     @property
@@ -154,15 +230,10 @@ class IRLightsSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} IR lights"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera Motion ir lights Status."""
         return self._base.api.ir_state
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -171,26 +242,20 @@ class IRLightsSwitch(ReolinkEntity, ToggleEntity):
 
         return "mdi:flashlight-off"
 
-    async def async_turn_on(self, **kwargs):
-        """Enable motion ir lights."""
-        await self._base.api.set_ir_lights(True)
-        await self.request_refresh()
+    async def async_write_state(self, state):
+        """Enable or disable the ir lights."""
+        return await self._base.api.set_ir_lights(state)
 
-    async def async_turn_off(self, **kwargs):
-        """Disable motion ir lights."""
-        await self._base.api.set_ir_lights(False)
-        await self.request_refresh()
 
-
-class SpotLightSwitch(ReolinkEntity, ToggleEntity):
+class SpotLightSwitch(ReolinkSwitch):
     """An implementation of a Reolink IP camera spotlight (WhiteLed) switch"""
 
-    
+    # The spotlight can be turned off by its schedule
+    _state_read_back = False
 
     def __init__(self, hass, config):
         """Initialize a Reolink camera."""
-        ReolinkEntity.__init__(self, hass, config)
-        ToggleEntity.__init__(self)
+        ReolinkSwitch.__init__(self, hass, config)
         self._slstatus = False
         self._attr_entity_category = EntityCategory.CONFIG
 
@@ -205,16 +270,11 @@ class SpotLightSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} Spotlight"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera Motion Spotlight Status."""
         # return self._base.api.whiteled_state
         return self._slstatus
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -223,20 +283,13 @@ class SpotLightSwitch(ReolinkEntity, ToggleEntity):
         else: 
             return "mdi:lightbulb-spot-off"
 
-    async def async_turn_on(self, **kwargs):
-        """Enable spotlight."""
+    async def async_write_state(self, state):
+        """Enable or disable the spotlight."""
         # uses call to simple turn on routine
         # which sets night mode on, auto, 100% bright
-        
-        await self._base.api.set_spotlight(True)
-        self._slstatus = True
-        await self.request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Disable spotlight."""
-        await self._base.api.set_spotlight(False)
-        self._slstatus = False
-        await self.request_refresh()    
+        result = await self._base.api.set_spotlight(state)
+        self._slstatus = state
+        return result
 
     async def set_schedule(self,**kwargs):
         # to set the schedule for when night mode on and auto off
@@ -260,17 +313,20 @@ class SpotLightSwitch(ReolinkEntity, ToggleEntity):
             elif key == "endmin":
                 _endmin = value
 
-        await self._base.api.set_spotlight_lighting_schedule(_endhour, _endmin, _starthour, _startmin )
-        await self.request_refresh()
+        with request_priority(PRIORITY_INTERACTIVE):
+            await self._base.api.set_spotlight_lighting_schedule(_endhour, _endmin, _starthour, _startmin )
+        self.async_write_ha_state()
 
 
-class SirenSwitch(ReolinkEntity, ToggleEntity):
+class SirenSwitch(ReolinkSwitch):
     """An implementation of a Reolink IP camera spotlight (WhiteLed) switch"""
 
+    # The siren stops by itself
+    _state_read_back = False
+
     def __init__(self, hass, config):
         """Initialize a Reolink camera."""
-        ReolinkEntity.__init__(self, hass, config)
-        ToggleEntity.__init__(self)
+        ReolinkSwitch.__init__(self, hass, config)
         self._sistatus = False
         self._attr_entity_category = EntityCategory.CONFIG
 
@@ -285,16 +341,11 @@ class SirenSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} Siren"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera Motion Siren Status."""
         # return self._base.api.audio_alarm_state
         return self._sistatus
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -303,29 +354,19 @@ class SirenSwitch(ReolinkEntity, ToggleEntity):
         else: 
             return "mdi:alarm-off"
 
-    async def async_turn_on(self, **kwargs):
-        """Turn On Siren."""
-        # uses call to simple turn on routine
-        # which sets night mode on, auto, 100% bright
-        
-        await self._base.api.set_siren(True)
-        self._sistatus = True
-        await self.request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Turn Off Siren."""
-        await self._base.api.set_siren(False)
-        self._sistatus = False
-        await self.request_refresh()
+    async def async_write_state(self, state):
+        """Turn the siren on or off."""
+        result = await self._base.api.set_siren(state)
+        self._sistatus = state
+        return result
 
 
-class PushSwitch(ReolinkEntity, ToggleEntity):
+class PushSwitch(ReolinkSwitch):
     """An implementation of a Reolink IP camera push switch."""
 
     def __init__(self, hass, config):
         """Initialize a Reolink camera."""
-        ReolinkEntity.__init__(self, hass, config)
-        ToggleEntity.__init__(self)
+        ReolinkSwitch.__init__(self, hass, config)
         self._attr_entity_category = EntityCategory.CONFIG
 
     @property
@@ -339,15 +380,10 @@ class PushSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} push notifications"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera push notification Status."""
         return self._base.api.push_state
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -356,23 +392,16 @@ class PushSwitch(ReolinkEntity, ToggleEntity):
 
         return "mdi:message-off"
 
-    async def async_turn_on(self, **kwargs):
-        """Enable push notifications."""
-        await self._base.api.set_push(True)
-        await self.request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Disable push notifications."""
-        await self._base.api.set_push(False)
-        await self.request_refresh()
+    async def async_write_state(self, state):
+        """Enable or disable push notifications."""
+        return await self._base.api.set_push(state)
 
-class RecordingSwitch(ReolinkEntity, ToggleEntity):
+class RecordingSwitch(ReolinkSwitch):
     """An implementation of a Reolink IP camera recording switch."""
 
     def __init__(self, hass, config):
         """Initialize a Reolink camera."""
-        ReolinkEntity.__init__(self, hass, config)
-        ToggleEntity.__init__(self)
+        ReolinkSwitch.__init__(self, hass, config)
         self._attr_entity_category = EntityCategory.CONFIG
 
     @property
@@ -386,15 +415,10 @@ class RecordingSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} recording"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera recording upload Status."""
         return self._base.api.recording_state
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -403,24 +427,17 @@ class RecordingSwitch(ReolinkEntity, ToggleEntity):
 
         return "mdi:filmstrip-off"
 
-    async def async_turn_on(self, **kwargs):
-        """Enable recording."""
-        await self._base.api.set_recording(True)
-        await self.request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Disable recording."""
-        await self._base.api.set_recording(False)
-        await self.request_refresh()
+    async def async_write_state(self, state):
+        """Enable or disable recording."""
+        return await self._base.api.set_recording(state)
 
 
-class AudioSwitch(ReolinkEntity, ToggleEntity):
+class AudioSwitch(ReolinkSwitch):
     """An implementation of a Reolink IP camera audio switch."""
 
     def __init__(self, hass, config):
         """Initialize a Reolink camera."""
-        ReolinkEntity.__init__(self, hass, config)
-        ToggleEntity.__init__(self)
+        ReolinkSwitch.__init__(self, hass, config)
         self._attr_entity_category = EntityCategory.CONFIG
 
     @property
@@ -434,15 +451,10 @@ class AudioSwitch(ReolinkEntity, ToggleEntity):
         return f"{self._base.name} record audio"
 
     @property
-    def is_on(self):
+    def api_state(self):
         """Camera audio switch Status."""
         return self._base.api.audio_state
 
-    @property
-    def device_class(self):
-        """Device class of the switch."""
-        return DEVICE_CLASS_SWITCH
-
     @property
     def icon(self):
         """Icon of the switch."""
@@ -451,12 +463,6 @@ class AudioSwitch(ReolinkEntity, ToggleEntity):
 
         return "mdi:volume-off"
 
-    async def async_turn_on(self, **kwargs):
-        """Enable audio recording."""
-        await self._base.api.set_audio(True)
-        await self.request_refresh()
-
-    async def async_turn_off(self, **kwargs):
-        """Disable audio recording."""
-        await self._base.api.set_audio(False)
-        await self.request_refresh()
+    async def async_write_state(self, state):
+        """Enable or disable audio recording."""
+        return await self._base.api.set_audio(state)
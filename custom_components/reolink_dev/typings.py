@@ -1,7 +1,8 @@
 """ Typing Definitions """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 
 
 @dataclass
@@ -23,3 +24,19 @@ class VoDEvent:
     file: str = None
     url: str = None
     thumbnail: VoDEventThumbnail = None
+
+
+@dataclass
+class CameraEvent:
+    """ Motion, detection or availability signal of a camera channel """
+
+    motion: Optional[bool] = None
+    available: Optional[bool] = None
+    objects: Optional[Dict[str, bool]] = None
+    smtp_objects: List[str] = field(default_factory=list)
+    channel: Optional[int] = None
+    channels: Optional[List[int]] = None
+    timestamp: Optional[str] = None
+    # Sent by the motion sensor to the object sensors of its channel
+    for_objects: bool = False
+    ai_refreshed: bool = False
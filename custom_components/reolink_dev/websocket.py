@@ -0,0 +1,37 @@
+"""This component provides the websocket commands of the Reolink integration."""
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, entity_registry
+import voluptuous as vol
+
+from .const import BASE, DOMAIN
+from .history import EVENT_TYPES, EventHistory
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/events",
+        vol.Required("entity_id"): cv.entity_id,
+        vol.Optional("limit"): cv.positive_int,
+        vol.Optional("event_type"): vol.In(EVENT_TYPES),
+    }
+)
+@callback
+def websocket_events(hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict):
+    """Return the recent detections of the camera of an entity."""
+    entry = entity_registry.async_get(hass).async_get(msg["entity_id"])
+    entries = hass.data.get(DOMAIN, {})
+    if entry is None or entry.platform != DOMAIN or entry.config_entry_id not in entries:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Reolink entity not found")
+        return
+
+    history: EventHistory = entries[entry.config_entry_id][BASE].history
+    connection.send_result(
+        msg["id"], {"events": history.entries(msg.get("limit"), msg.get("event_type"))}
+    )
+
+
+@callback
+def async_register_commands(hass: HomeAssistant):
+    """Register the websocket commands."""
+    websocket_api.async_register_command(hass, websocket_events)